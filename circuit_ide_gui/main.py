@@ -13,10 +13,16 @@ Features:
 
 import sys
 import os
+import io
 import json
+import weakref
+import mmap
+import codecs
+import hashlib
 import asyncio
 import subprocess
 import re
+import shutil
 import time
 import logging
 from pathlib import Path
@@ -28,6 +34,10 @@ from typing import Optional, List, Dict, Any, Callable
 from datetime import datetime
 from enum import Enum
 import threading
+from collections import OrderedDict, deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from array import array
+from bisect import bisect_left, bisect_right
 
 from PySide6.QtWidgets import (
     QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
@@ -44,13 +54,14 @@ from PySide6.QtWidgets import (
 from PySide6.QtCore import (
     Qt, QDir, Signal, Slot, QThread, QObject, QSize, QTimer,
     QMargins, QPropertyAnimation, QEasingCurve, Property, QPoint, QPointF,
-    QRect, QRectF, QProcess, QProcessEnvironment
+    QRect, QRectF, QProcess, QProcessEnvironment, QEvent, QRunnable, QThreadPool,
+    QUrl, QFileSystemWatcher
 )
 from PySide6.QtGui import (
     QFont, QTextCharFormat, QColor, QSyntaxHighlighter,
     QAction, QKeySequence, QTextCursor, QIcon, QPainter,
     QPixmap, QPen, QBrush, QPalette, QLinearGradient, QFontDatabase,
-    QPainterPath, QPolygonF, QShortcut
+    QPainterPath, QPolygonF, QShortcut, QDesktopServices, QStaticText
 )
 
 # Add parent to path for imports
@@ -58,6 +69,23 @@ _parent = Path(__file__).parent.parent
 if str(_parent) not in sys.path:
     sys.path.insert(0, str(_parent))
 
+# Qt enum members compared in eventFilters, which run for every filtered
+# event; resolve the nested enum attributes once instead of per event
+_KEY_PRESS = QEvent.Type.KeyPress
+_CTRL = Qt.KeyboardModifier.ControlModifier
+_KEY_UP = Qt.Key.Key_Up
+_KEY_DOWN = Qt.Key.Key_Down
+_KEY_ESCAPE = Qt.Key.Key_Escape
+_KEY_TAB = Qt.Key.Key_Tab
+_KEY_RETURN = Qt.Key.Key_Return
+_KEY_ENTER = Qt.Key.Key_Enter
+_KEY_DELETE = Qt.Key.Key_Delete
+_KEY_BACKSPACE = Qt.Key.Key_Backspace
+_KEY_F2 = Qt.Key.Key_F2
+_KEY_C = Qt.Key.Key_C
+_KEY_L = Qt.Key.Key_L
+_KEY_N = Qt.Key.Key_N
+
 
 # ============================================================================
 # Theme System
@@ -223,13 +251,24 @@ class ThemeManager:
 class Theme:
     """Theme accessor with static methods."""
 
+    _qcolors: Dict[str, QColor] = {}  # key -> parsed QColor, cleared on theme change
+
     @staticmethod
     def get(key: str) -> str:
         return ThemeManager.get(key)
 
+    @classmethod
+    def qcolor(cls, key: str) -> QColor:
+        """Cached QColor for a theme key (avoids re-parsing the hex string)."""
+        color = cls._qcolors.get(key)
+        if color is None:
+            color = cls._qcolors[key] = QColor(getattr(cls, key))
+        return color
+
 
 # Update Theme class attributes dynamically
 def _update_theme_class():
+    Theme._qcolors.clear()
     theme = ThemeManager.get_theme()
     for key, value in theme.items():
         if key != "name":
@@ -240,6 +279,34 @@ _update_theme_class()
 ThemeManager.on_change(lambda t: _update_theme_class())
 
 
+class ThemedStylesheets:
+    """Mixin for widgets whose stylesheets are Theme templates.
+
+    Subclasses fill _QSS_TEMPLATES; _stylesheet(name) formats a template once
+    per theme. Override _qss_values() to supply placeholders beyond the theme.
+    """
+
+    _QSS_TEMPLATES: Dict[str, str] = {}
+    _qss_cache: Dict[tuple, str] = {}  # (class, name) -> stylesheet for the current theme
+
+    @classmethod
+    def _qss_values(cls) -> Dict[str, str]:
+        return ThemeManager.get_theme()
+
+    @classmethod
+    def _stylesheet(cls, name: str) -> str:
+        """Stylesheet for the current theme, formatted on first use."""
+        key = (cls, name)
+        qss = ThemedStylesheets._qss_cache.get(key)
+        if qss is None:
+            qss = ThemedStylesheets._qss_cache[key] = cls._QSS_TEMPLATES[name].format_map(
+                cls._qss_values())
+        return qss
+
+
+ThemeManager.on_change(lambda t: ThemedStylesheets._qss_cache.clear())
+
+
 # ============================================================================
 # Configuration
 # ============================================================================
@@ -362,6 +429,7 @@ class Icons:
 
     # Icon cache to avoid recreating the same icons
     _icon_cache: Dict[tuple, QIcon] = {}
+    _pixmap_cache: Dict[tuple, QPixmap] = {}  # (name, size, color) -> pixmap
 
     # Official VS Code icon SVG paths (from microsoft/vscode-icons)
     SVG_CLOSE = '<path fill-rule="evenodd" clip-rule="evenodd" d="M8.00004 8.70711L11.6465 12.3536L12.3536 11.6465L8.70714 8.00001L12.3536 4.35356L11.6465 3.64645L8.00004 7.2929L4.35359 3.64645L3.64648 4.35356L7.29293 8.00001L3.64648 11.6465L4.35359 12.3536L8.00004 8.70711Z" fill="{color}"/>'
@@ -437,10 +505,20 @@ class Icons:
         cls._icon_cache[cache_key] = icon
         return icon
 
+    @classmethod
+    def pixmap(cls, name: str, size: int, color: str) -> QPixmap:
+        """Pixmap of the named icon (e.g. "check"), rasterized once per size/color."""
+        key = (name, size, color)
+        pixmap = cls._pixmap_cache.get(key)
+        if pixmap is None:
+            pixmap = cls._pixmap_cache[key] = getattr(cls, name)(size, color).pixmap(size, size)
+        return pixmap
+
     @classmethod
     def clear_cache(cls):
         """Clear the icon cache. Call when theme changes."""
         cls._icon_cache.clear()
+        cls._pixmap_cache.clear()
 
     @classmethod
     def close(cls, size: int = 16, color: str = None) -> QIcon:
@@ -1282,6 +1360,15 @@ class PygmentsHighlighter(QSyntaxHighlighter):
 class PythonHighlighter(QSyntaxHighlighter):
     """Fallback syntax highlighter for Python code when Pygments unavailable."""
 
+    KEYWORDS = (
+        "and", "as", "assert", "async", "await", "break", "class",
+        "continue", "def", "del", "elif", "else", "except", "finally",
+        "for", "from", "global", "if", "import", "in", "is", "lambda",
+        "not", "or", "pass", "raise", "return", "try", "while", "with", "yield"
+    )
+    # One alternation instead of a separate pattern (and scan) per keyword
+    KEYWORD_RE = re.compile(r"\b(?:%s)\b" % "|".join(KEYWORDS))
+
     def __init__(self, document):
         super().__init__(document)
         self._rules = []
@@ -1292,14 +1379,7 @@ class PythonHighlighter(QSyntaxHighlighter):
         keyword_fmt.setForeground(QColor(Theme.ACCENT_PURPLE))
         keyword_fmt.setFontWeight(QFont.Weight.Bold)
 
-        keywords = [
-            "and", "as", "assert", "async", "await", "break", "class",
-            "continue", "def", "del", "elif", "else", "except", "finally",
-            "for", "from", "global", "if", "import", "in", "is", "lambda",
-            "not", "or", "pass", "raise", "return", "try", "while", "with", "yield"
-        ]
-        for word in keywords:
-            self._rules.append((re.compile(rf"\b{word}\b"), keyword_fmt))
+        self._rules.append((self.KEYWORD_RE, keyword_fmt))
 
         string_fmt = QTextCharFormat()
         string_fmt.setForeground(QColor(Theme.ACCENT_ORANGE))
@@ -1788,17 +1868,17 @@ class FileExplorer(QWidget):
 
     def eventFilter(self, obj, event):
         """Handle keyboard shortcuts."""
-        if obj == self.tree and event.type() == event.Type.KeyPress:
+        if event.type() == _KEY_PRESS and obj is self.tree:
             key = event.key()
             modifiers = event.modifiers()
 
-            if key == Qt.Key.Key_F2:  # Rename
+            if key == _KEY_F2:  # Rename
                 self._rename_selected()
                 return True
-            elif key == Qt.Key.Key_Delete or key == Qt.Key.Key_Backspace:  # Delete
+            elif key == _KEY_DELETE or key == _KEY_BACKSPACE:  # Delete
                 self._delete_selected()
                 return True
-            elif key == Qt.Key.Key_Return or key == Qt.Key.Key_Enter:  # Open
+            elif key == _KEY_RETURN or key == _KEY_ENTER:  # Open
                 index = self.tree.currentIndex()
                 if index.isValid():
                     path = Path(self.model.filePath(index))
@@ -1807,10 +1887,10 @@ class FileExplorer(QWidget):
                     else:
                         self.tree.setExpanded(index, not self.tree.isExpanded(index))
                 return True
-            elif key == Qt.Key.Key_C and modifiers & Qt.KeyboardModifier.ControlModifier:  # Copy path
+            elif key == _KEY_C and modifiers & _CTRL:  # Copy path
                 self._copy_path()
                 return True
-            elif key == Qt.Key.Key_N and modifiers & Qt.KeyboardModifier.ControlModifier:  # New file
+            elif key == _KEY_N and modifiers & _CTRL:  # New file
                 self._new_file()
                 return True
 
@@ -2017,7 +2097,6 @@ class FileExplorer(QWidget):
             for path in paths:
                 try:
                     if path.is_dir():
-                        import shutil
                         shutil.rmtree(path)
                     else:
                         path.unlink()
@@ -2053,7 +2132,7 @@ class FileExplorer(QWidget):
             elif sys.platform == "win32":
                 subprocess.run(["explorer", "/select,", path])
             else:
-                subprocess.run(["xdg-open", str(Path(path).parent)])
+                QDesktopServices.openUrl(QUrl.fromLocalFile(str(Path(path).parent)))
 
     def _open_in_terminal(self):
         """Open terminal at selected location."""
@@ -2340,19 +2419,19 @@ class CommandPalette(QDialog):
 
     def eventFilter(self, obj, event):
         """Handle keyboard navigation."""
-        if obj == self.search_input and event.type() == event.Type.KeyPress:
+        if event.type() == _KEY_PRESS and obj is self.search_input:
             key = event.key()
-            if key == Qt.Key.Key_Down:
+            if key == _KEY_DOWN:
                 current = self.command_list.currentRow()
                 if current < self.command_list.count() - 1:
                     self.command_list.setCurrentRow(current + 1)
                 return True
-            elif key == Qt.Key.Key_Up:
+            elif key == _KEY_UP:
                 current = self.command_list.currentRow()
                 if current > 0:
                     self.command_list.setCurrentRow(current - 1)
                 return True
-            elif key == Qt.Key.Key_Escape:
+            elif key == _KEY_ESCAPE:
                 self.reject()
                 return True
         return super().eventFilter(obj, event)
@@ -2562,19 +2641,19 @@ class QuickOpenDialog(QDialog):
 
     def eventFilter(self, obj, event):
         """Handle keyboard navigation."""
-        if obj == self.search_input and event.type() == event.Type.KeyPress:
+        if event.type() == _KEY_PRESS and obj is self.search_input:
             key = event.key()
-            if key == Qt.Key.Key_Down:
+            if key == _KEY_DOWN:
                 current = self.file_list.currentRow()
                 if current < self.file_list.count() - 1:
                     self.file_list.setCurrentRow(current + 1)
                 return True
-            elif key == Qt.Key.Key_Up:
+            elif key == _KEY_UP:
                 current = self.file_list.currentRow()
                 if current > 0:
                     self.file_list.setCurrentRow(current - 1)
                 return True
-            elif key == Qt.Key.Key_Escape:
+            elif key == _KEY_ESCAPE:
                 self.reject()
                 return True
         return super().eventFilter(obj, event)
@@ -3760,6 +3839,10 @@ class GitPanel(QWidget):
 # Settings Panel
 # ============================================================================
 
+# Classic (ghp_) and fine-grained (github_pat_) personal access tokens
+_GH_PAT_RE = re.compile(r"^(ghp_[A-Za-z0-9]{36,}|github_pat_[A-Za-z0-9_]{22,})$")
+
+
 class SettingsPanel(QWidget):
     """VS Code-style settings panel with comprehensive options."""
 
@@ -3767,9 +3850,9 @@ class SettingsPanel(QWidget):
     provider_changed = Signal(str)  # Emits 'cisco' or 'anthropic'
     editor_settings_changed = Signal(dict)  # For editor-specific settings
 
-    CISCO_MODELS = ["gpt-4.1", "gpt-4o", "gpt-4o-mini", "o4-mini", "o1"]
-    CLAUDE_MODELS = ["claude-sonnet-4-20250514", "claude-opus-4-20250514",
-                     "claude-3-5-sonnet-20241022", "claude-3-5-haiku-20241022"]
+    CISCO_MODELS = ("gpt-4.1", "gpt-4o", "gpt-4o-mini", "o4-mini", "o1")
+    CLAUDE_MODELS = ("claude-sonnet-4-20250514", "claude-opus-4-20250514",
+                     "claude-3-5-sonnet-20241022", "claude-3-5-haiku-20241022")
 
     def __init__(self, parent=None):
         super().__init__(parent)
@@ -3873,6 +3956,7 @@ class SettingsPanel(QWidget):
             "Select the AI model to use"
         )
         self.model_combo = QComboBox()
+        self._populated_models = None  # Model tuple currently in model_combo
         self.model_combo.setFixedWidth(200)
         self.model_combo.setStyleSheet(self._combo_style())
         self.model_combo.currentTextChanged.connect(self._on_model_changed)
@@ -4568,12 +4652,16 @@ class SettingsPanel(QWidget):
                     "scope": "openai",
                 }
 
-                with httpx.Client(verify=ssl_config.get_verify_param(), timeout=10.0) as client:
+                # Short connect timeout so an unreachable host fails fast
+                timeout = httpx.Timeout(10.0, connect=2.0)
+                with httpx.Client(verify=ssl_config.get_verify_param(), timeout=timeout) as client:
                     response = client.post(TOKEN_URL, data=token_data)
                     if response.status_code == 200:
                         return True, "Connection successful!"
                     else:
                         return False, f"Auth failed: {response.status_code}"
+            except httpx.ConnectTimeout:
+                return False, "Cannot reach auth server (network/DNS)"
             except Exception as e:
                 return False, f"Error: {str(e)[:50]}"
 
@@ -4648,7 +4736,7 @@ class SettingsPanel(QWidget):
             try:
                 import httpx
 
-                with httpx.Client(timeout=10.0) as client:
+                with httpx.Client(timeout=httpx.Timeout(10.0, connect=2.0)) as client:
                     response = client.get(
                         "https://api.anthropic.com/v1/models",
                         headers={
@@ -4662,6 +4750,8 @@ class SettingsPanel(QWidget):
                         return False, "Invalid API key"
                     else:
                         return False, f"Error: {response.status_code}"
+            except httpx.ConnectTimeout:
+                return False, "Cannot reach api.anthropic.com (network/DNS)"
             except Exception as e:
                 return False, f"Error: {str(e)[:40]}"
 
@@ -4767,8 +4857,8 @@ class SettingsPanel(QWidget):
             return
 
         # Basic PAT validation
-        if not (pat.startswith("ghp_") or pat.startswith("github_pat_")):
-            self.mcp_status.setText("Invalid PAT format (should start with ghp_ or github_pat_)")
+        if not _GH_PAT_RE.match(pat):
+            self.mcp_status.setText("Invalid PAT format (expected a full ghp_ or github_pat_ token)")
             self.mcp_status.setStyleSheet(f"color: {Theme.ERROR}; font-size: 11px;")
             return
 
@@ -4780,8 +4870,9 @@ class SettingsPanel(QWidget):
                 from circuit_agent.config import ssl_config
                 import httpx
 
-                # Test GitHub API with the PAT
-                with httpx.Client(verify=ssl_config.get_verify_param(), timeout=10.0) as client:
+                # Test GitHub API with the PAT; short connect timeout fails fast offline
+                timeout = httpx.Timeout(10.0, connect=2.0)
+                with httpx.Client(verify=ssl_config.get_verify_param(), timeout=timeout) as client:
                     response = client.get(
                         "https://api.github.com/user",
                         headers={
@@ -4797,6 +4888,8 @@ class SettingsPanel(QWidget):
                         return False, "Invalid or expired token"
                     else:
                         return False, f"Error: {response.status_code}"
+            except httpx.ConnectTimeout:
+                return False, "Cannot reach api.github.com (network/DNS)"
             except httpx.TimeoutException:
                 return False, "Connection timed out"
             except httpx.ConnectError as e:
@@ -4858,28 +4951,27 @@ class SettingsPanel(QWidget):
             return
 
         provider = self.settings.get("provider", "cisco")
+        models = self.CISCO_MODELS if provider == "cisco" else self.CLAUDE_MODELS
+
+        # Skip the clear/re-add (and the combo re-layout) when already populated
+        if self._populated_models is models:
+            return
+
         current_model = self.model_combo.currentText()
 
         self.model_combo.blockSignals(True)
         self.model_combo.clear()
+        self.model_combo.addItems(list(models))
 
-        if provider == "cisco":
-            self.model_combo.addItems(self.CISCO_MODELS)
-            # Try to restore selection or default
-            if current_model in self.CISCO_MODELS:
-                self.model_combo.setCurrentText(current_model)
-            else:
-                self.model_combo.setCurrentIndex(0)
-                self.settings["model"] = self.CISCO_MODELS[0]
+        # Try to restore selection or default
+        if current_model in models:
+            self.model_combo.setCurrentText(current_model)
         else:
-            self.model_combo.addItems(self.CLAUDE_MODELS)
-            if current_model in self.CLAUDE_MODELS:
-                self.model_combo.setCurrentText(current_model)
-            else:
-                self.model_combo.setCurrentIndex(0)
-                self.settings["model"] = self.CLAUDE_MODELS[0]
+            self.model_combo.setCurrentIndex(0)
+            self.settings["model"] = models[0]
 
         self.model_combo.blockSignals(False)
+        self._populated_models = models
 
     def _on_model_changed(self, model):
         self.settings["model"] = model
@@ -5135,6 +5227,13 @@ class FindReplaceWidget(QWidget):
         self.setFixedHeight(70)
         self._show_replace = False
 
+        # Debounce find-as-you-type so a burst of keystrokes runs one search
+        self._pending_text = ""
+        self._search_timer = QTimer(self)
+        self._search_timer.setSingleShot(True)
+        self._search_timer.setInterval(150)
+        self._search_timer.timeout.connect(self._emit_pending_search)
+
         self.setStyleSheet(f"""
             QWidget {{
                 background: {Theme.BG_SECONDARY};
@@ -5156,8 +5255,16 @@ class FindReplaceWidget(QWidget):
         self.find_input.returnPressed.connect(self._find_next)
         find_row.addWidget(self.find_input)
 
+        # Match label styles are built once and only applied on state changes
+        self._match_styles = {
+            "idle": f"color: {Theme.TEXT_MUTED}; font-size: 10px;",
+            "warn": f"color: {Theme.WARNING}; font-size: 10px;",
+            "ok": f"color: {Theme.TEXT_PRIMARY}; font-size: 10px;",
+            "success": f"color: {Theme.SUCCESS}; font-size: 10px;",
+        }
+        self._match_state = None
         self.match_label = QLabel("No results")
-        self.match_label.setStyleSheet(f"color: {Theme.TEXT_MUTED}; font-size: 10px;")
+        self._set_match_state("idle")
         self.match_label.setFixedWidth(80)
         find_row.addWidget(self.match_label)
 
@@ -5211,16 +5318,26 @@ class FindReplaceWidget(QWidget):
         self.setFixedHeight(35)
 
     def _on_find_changed(self, text: str):
-        """Trigger search when text changes."""
+        """Schedule a search when text changes (restarting cancels the prior one)."""
+        self._pending_text = text
         if text:
-            self.find_next.emit(text, self.case_btn.isChecked())
+            self._search_timer.start()
+        else:
+            self._search_timer.stop()
+
+    def _emit_pending_search(self):
+        """Run the search scheduled by the last keystroke."""
+        if self._pending_text:
+            self.find_next.emit(self._pending_text, self.case_btn.isChecked())
 
     def _find_next(self):
+        self._search_timer.stop()
         text = self.find_input.text()
         if text:
             self.find_next.emit(text, self.case_btn.isChecked())
 
     def _find_prev(self):
+        self._search_timer.stop()
         text = self.find_input.text()
         if text:
             self.find_prev.emit(text, self.case_btn.isChecked())
@@ -5243,16 +5360,28 @@ class FindReplaceWidget(QWidget):
         self.setFixedHeight(70 if self._show_replace else 35)
 
     def _close(self):
+        self._search_timer.stop()
         self.hide()
         self.closed.emit()
 
+    def _set_match_state(self, state: str):
+        """Restyle the match label, skipping the CSS parse if unchanged."""
+        if state != self._match_state:
+            self.match_label.setStyleSheet(self._match_styles[state])
+            self._match_state = state
+
     def update_match_count(self, current: int, total: int):
         if total == 0:
             self.match_label.setText("No results")
-            self.match_label.setStyleSheet(f"color: {Theme.WARNING}; font-size: 10px;")
+            self._set_match_state("warn")
         else:
             self.match_label.setText(f"{current}/{total}")
-            self.match_label.setStyleSheet(f"color: {Theme.TEXT_PRIMARY}; font-size: 10px;")
+            self._set_match_state("ok")
+
+    def show_replaced_count(self, count: int):
+        """Report the result of Replace All."""
+        self.match_label.setText(f"{count} replaced")
+        self._set_match_state("success")
 
     def show_find(self):
         """Show find widget and focus input."""
@@ -5282,6 +5411,13 @@ class FindReplaceWidget(QWidget):
 class LineNumberArea(QWidget):
     """Professional line number gutter with VS Code-style features."""
 
+    GIT_CHANGE_COLORS = {
+        'added': QColor("#4EC9B0"),     # Green
+        'modified': QColor("#569CD6"),  # Blue
+        'deleted': QColor("#F14C4C"),   # Red
+    }
+    BREAKPOINT_COLOR = QColor("#E51400")  # Red breakpoint
+
     def __init__(self, editor: 'CodeEditor'):
         super().__init__(editor)
         self._editor = editor
@@ -5289,6 +5425,14 @@ class LineNumberArea(QWidget):
         self._git_changes: Dict[int, str] = {}  # line -> 'added'|'modified'|'deleted'
         self._breakpoints: set = set()  # Lines with breakpoints
         self._hovered_line = -1
+        self._last_current_line = 0  # Block number last painted as current
+        self._labels_key = None  # (first_block, count, cursor line or None)
+        self._labels: tuple = ()
+
+        # Width only changes when the digit count or the font changes
+        self._cached_digits = -1
+        self._cached_width = -1
+        self._fm_height: Optional[int] = None  # Editor font height, reset on FontChange
 
         # Enable mouse tracking for hover effects
         self.setMouseTracking(True)
@@ -5299,9 +5443,30 @@ class LineNumberArea(QWidget):
     def _calculate_width(self):
         """Calculate width needed for line numbers with extra space for indicators."""
         digits = len(str(max(1, self._editor.blockCount())))
+        if digits == self._cached_digits:
+            return self._cached_width
         # Width: left padding (4) + git indicator (4) + number area + right padding (8)
         number_width = self._editor.fontMetrics().horizontalAdvance('9') * digits
-        return 16 + number_width + 8
+        self._cached_digits = digits
+        self._cached_width = 16 + number_width + 8
+        return self._cached_width
+
+    def _invalidate_width_cache(self):
+        """Force the next width calculation to re-measure the font."""
+        self._cached_digits = -1
+        self.updateGeometry()
+
+    def changeEvent(self, event):
+        """Re-measure when the (inherited) editor font changes."""
+        if event.type() == QEvent.Type.FontChange:
+            self._fm_height = None
+            self._invalidate_width_cache()
+        super().changeEvent(event)
+
+    def _font_height(self) -> int:
+        if self._fm_height is None:
+            self._fm_height = self._editor.fontMetrics().height()
+        return self._fm_height
 
     def set_relative_numbers(self, enabled: bool):
         """Toggle relative line numbers (vim-style)."""
@@ -5319,151 +5484,174 @@ class LineNumberArea(QWidget):
             self._breakpoints.remove(line)
         else:
             self._breakpoints.add(line)
-        self.update()
+        self._update_line(line - 1)
+
+    def _update_line(self, block_number: int):
+        """Repaint only the band of the gutter occupied by one block."""
+        if block_number < 0:
+            return
+        block = self._editor.document().findBlockByNumber(block_number)
+        if not block.isValid():
+            return
+        rect = self._editor.blockBoundingGeometry(block).translated(self._editor.contentOffset())
+        self.update(0, int(rect.top()), self.width(), int(rect.height()) + 1)
+
+    def current_line_changed(self, block_number: int):
+        """Repaint the previous and new current lines after a cursor move."""
+        if self._relative_numbers:
+            # Every visible number is relative to the cursor
+            self.update()
+        elif block_number != self._last_current_line:
+            self._update_line(self._last_current_line)
+            self._update_line(block_number)
+        self._last_current_line = block_number
 
     def paintEvent(self, event):
         """Paint line numbers with enhanced visual features."""
         painter = QPainter(self)
-        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+        # Fills and the separator are pixel-aligned; only text and the breakpoint
+        # ellipse benefit from antialiasing
+        painter.setRenderHint(QPainter.RenderHint.TextAntialiasing, True)
 
         # Background with subtle gradient
-        bg_color = QColor(Theme.BG_SECONDARY)
-        painter.fillRect(event.rect(), bg_color)
+        painter.fillRect(event.rect(), Theme.qcolor("BG_SECONDARY"))
 
         # Right border separator
-        border_color = QColor(Theme.BORDER)
-        painter.setPen(QPen(border_color, 1))
+        painter.setPen(QPen(Theme.qcolor("BORDER"), 1))
         painter.drawLine(self.width() - 1, event.rect().top(),
                         self.width() - 1, event.rect().bottom())
 
-        block = self._editor.firstVisibleBlock()
-        block_number = block.blockNumber()
-        top = int(self._editor.blockBoundingGeometry(block).translated(
-            self._editor.contentOffset()).top())
-        bottom = top + int(self._editor.blockBoundingRect(block).height())
+        visible = self._editor.visible_blocks()
+        if not visible:
+            return
 
         # Get current line for highlighting
         current_line = self._editor.textCursor().blockNumber()
-        font_height = self._editor.fontMetrics().height()
+        font_height = self._font_height()
 
         # Prepare fonts
         normal_font = self._editor.font()
         bold_font = QFont(normal_font)
         bold_font.setWeight(QFont.Weight.Bold)
 
-        while block.isValid() and top <= event.rect().bottom():
-            if block.isVisible() and bottom >= event.rect().top():
+        first_block = visible[0][0]
+        labels = self._visible_labels(first_block, font_height, current_line)
+        rect_top, rect_bottom = event.rect().top(), event.rect().bottom()
+
+        # Normal font and muted pen are the default state; only the current line
+        # (and a breakpoint's NoPen) change it, and they restore it afterwards
+        muted_pen = Theme.qcolor("TEXT_MUTED")
+        painter.setFont(normal_font)
+        painter.setPen(muted_pen)
+
+        for block_number, top, bottom in visible:
+            if top > rect_bottom:
+                break
+            if bottom >= rect_top:
                 line_num = block_number + 1
 
-                # Calculate display number (relative or absolute)
-                if self._relative_numbers and block_number != current_line:
-                    display_num = abs(block_number - current_line)
+                # Display number (relative or absolute) was precomputed for the viewport
+                index = block_number - first_block
+                if index < len(labels):
+                    number = labels[index]
+                elif self._relative_numbers and block_number != current_line:
+                    number = str(abs(block_number - current_line))  # Past folded blocks
                 else:
-                    display_num = line_num
-
-                number = str(display_num)
+                    number = str(line_num)
 
                 # Draw current line highlight background
                 if block_number == current_line:
-                    highlight_color = QColor(Theme.BG_HOVER)
-                    painter.fillRect(0, top, self.width() - 1, font_height, highlight_color)
+                    painter.fillRect(0, top, self.width() - 1, font_height, Theme.qcolor("BG_HOVER"))
 
                 # Draw git change indicator (left edge)
                 if line_num in self._git_changes:
-                    change_type = self._git_changes[line_num]
-                    if change_type == 'added':
-                        indicator_color = QColor("#4EC9B0")  # Green
-                    elif change_type == 'modified':
-                        indicator_color = QColor("#569CD6")  # Blue
-                    elif change_type == 'deleted':
-                        indicator_color = QColor("#F14C4C")  # Red
-                    else:
-                        indicator_color = QColor(Theme.TEXT_MUTED)
+                    indicator_color = self.GIT_CHANGE_COLORS.get(self._git_changes[line_num])
+                    if indicator_color is None:
+                        indicator_color = muted_pen
                     painter.fillRect(0, top, 3, font_height, indicator_color)
 
                 # Draw breakpoint indicator
                 if line_num in self._breakpoints:
-                    bp_color = QColor("#E51400")  # Red breakpoint
+                    bp_color = self.BREAKPOINT_COLOR
                     bp_radius = 4
                     bp_x = 8
                     bp_y = top + (font_height - bp_radius * 2) // 2 + bp_radius
                     painter.setBrush(bp_color)
                     painter.setPen(Qt.PenStyle.NoPen)
+                    painter.setRenderHint(QPainter.RenderHint.Antialiasing, True)
                     painter.drawEllipse(QPointF(bp_x, bp_y), bp_radius, bp_radius)
+                    painter.setRenderHint(QPainter.RenderHint.Antialiasing, False)
+                    painter.setPen(muted_pen)
 
                 # Draw hover highlight
                 if block_number == self._hovered_line and block_number != current_line:
-                    hover_color = QColor(Theme.BG_TERTIARY)
-                    painter.fillRect(0, top, self.width() - 1, font_height, hover_color)
+                    painter.fillRect(0, top, self.width() - 1, font_height, Theme.qcolor("BG_TERTIARY"))
 
-                # Set font and color for line number
-                if block_number == current_line:
-                    painter.setPen(QColor(Theme.TEXT_PRIMARY))
+                # Draw line number (right-aligned with padding); the current line is bold
+                is_current = block_number == current_line
+                if is_current:
+                    painter.setPen(Theme.qcolor("TEXT_PRIMARY"))
                     painter.setFont(bold_font)
-                else:
-                    painter.setPen(QColor(Theme.TEXT_MUTED))
-                    painter.setFont(normal_font)
-
-                # Draw line number (right-aligned with padding)
                 painter.drawText(0, top, self.width() - 8,
                                font_height,
                                Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter,
                                number)
+                if is_current:
+                    painter.setFont(normal_font)
+                    painter.setPen(muted_pen)
 
-            block = block.next()
-            top = bottom
-            bottom = top + int(self._editor.blockBoundingRect(block).height())
-            block_number += 1
+    def _visible_labels(self, first_block: int, font_height: int, current_line: int) -> tuple:
+        """Line-number strings for the blocks that fit in the viewport.
+
+        Reused across paints until the viewport scrolls, the block count
+        changes, or (in relative mode) the cursor line changes.
+        """
+        count = min(self.height() // max(font_height, 1) + 2,
+                    self._editor.blockCount() - first_block)
+        key = (first_block, count, current_line if self._relative_numbers else None)
+        if key != self._labels_key:
+            if self._relative_numbers:
+                self._labels = tuple(
+                    str(abs(n - current_line)) if n != current_line else str(n + 1)
+                    for n in range(first_block, first_block + count)
+                )
+            else:
+                self._labels = tuple(str(n + 1) for n in range(first_block, first_block + count))
+            self._labels_key = key
+        return self._labels
 
     def mouseMoveEvent(self, event):
         """Track mouse for hover effects."""
         # Calculate which line is being hovered
-        block = self._editor.firstVisibleBlock()
-        top = int(self._editor.blockBoundingGeometry(block).translated(
-            self._editor.contentOffset()).top())
-
-        while block.isValid():
-            bottom = top + int(self._editor.blockBoundingRect(block).height())
-            if top <= event.position().y() < bottom:
-                if self._hovered_line != block.blockNumber():
-                    self._hovered_line = block.blockNumber()
-                    self.update()
-                return
-            top = bottom
-            block = block.next()
-
-        if self._hovered_line != -1:
-            self._hovered_line = -1
-            self.update()
+        block = self._editor.block_at_y(event.position().y())
+        new_line = block.blockNumber() if block is not None else -1
+        if self._hovered_line != new_line:
+            self._update_line(self._hovered_line)
+            self._hovered_line = new_line
+            self._update_line(new_line)
 
     def leaveEvent(self, event):
         """Clear hover when mouse leaves."""
         if self._hovered_line != -1:
+            self._update_line(self._hovered_line)
             self._hovered_line = -1
-            self.update()
 
     def mousePressEvent(self, event):
         """Handle clicks for breakpoints."""
         if event.button() == Qt.MouseButton.LeftButton:
             # Calculate which line was clicked
-            block = self._editor.firstVisibleBlock()
-            top = int(self._editor.blockBoundingGeometry(block).translated(
-                self._editor.contentOffset()).top())
-
-            while block.isValid():
-                bottom = top + int(self._editor.blockBoundingRect(block).height())
-                if top <= event.position().y() < bottom:
-                    # Left area click = toggle breakpoint
-                    if event.position().x() < 16:
-                        self.toggle_breakpoint(block.blockNumber() + 1)
-                    else:
-                        # Click on line number = go to line
-                        cursor = self._editor.textCursor()
-                        cursor.setPosition(block.position())
-                        self._editor.setTextCursor(cursor)
-                    return
-                top = bottom
-                block = block.next()
+            block = self._editor.block_at_y(event.position().y())
+            if block is None:
+                return
+
+            # Left area click = toggle breakpoint
+            if event.position().x() < 16:
+                self.toggle_breakpoint(block.blockNumber() + 1)
+            else:
+                # Click on line number = go to line
+                cursor = self._editor.textCursor()
+                cursor.setPosition(block.position())
+                self._editor.setTextCursor(cursor)
 
 
 class FoldingArea(QWidget):
@@ -5472,100 +5660,235 @@ class FoldingArea(QWidget):
     def __init__(self, editor: 'CodeEditor'):
         super().__init__(editor)
         self._editor = editor
-        self._fold_regions: Dict[int, int] = {}  # start_line -> end_line
+        # Fold regions as parallel arrays sorted by start line (bisect lookups)
+        self._fold_starts = array('i')
+        self._fold_ends = array('i')
         self._collapsed: set = set()  # Set of collapsed start lines
 
         self.setFixedWidth(16)
         self.setCursor(Qt.CursorShape.PointingHandCursor)
-
-        # Connect to editor signals
-        self._editor.blockCountChanged.connect(self._update_folds)
-        self._editor.updateRequest.connect(self._update_area)
-        self._editor.textChanged.connect(self._update_folds)
+        self._fm_height: Optional[int] = None  # Editor font height, reset on FontChange
+
+        # Edits are coalesced and only the changed top-level region is rescanned
+        self._dirty_range: Optional[tuple] = None  # (lo, hi) character positions
+        self._block_count = self._editor.document().blockCount()
+        self._fold_timer = QTimer(self)
+        self._fold_timer.setSingleShot(True)
+        self._fold_timer.setInterval(300)
+        self._fold_timer.timeout.connect(self._update_folds)
+
+        # Connect to editor signals (scroll/repaint is driven by CodeEditor)
+        self._editor.document().contentsChange.connect(self._on_contents_change)
+
+    # Dirty ranges spanning more lines than this trigger a full rescan
+    INCREMENTAL_FOLD_LIMIT = 200
+    # Larger documents (in characters) are scanned block by block, not split in one go
+    BULK_FOLD_SCAN_LIMIT = 1_000_000
+
+    def _on_contents_change(self, pos: int, removed: int, added: int):
+        """Record the edited character range and schedule a fold update."""
+        if self._dirty_range is None:
+            lo, hi = pos, pos + added
+        else:
+            lo, hi = self._dirty_range
+            if hi >= pos:
+                hi += added - removed
+            lo = min(lo, pos)
+            hi = max(hi, pos + added)
+        self._dirty_range = (lo, hi)
+        self._fold_timer.start()
 
     def _update_folds(self, block_count=None):
         """Detect foldable regions based on indentation."""
-        self._fold_regions.clear()
         doc = self._editor.document()
-        block = doc.begin()
-        stack = []  # Stack of (start_line, indent_level)
+        dirty, self._dirty_range = self._dirty_range, None
+        old_count, self._block_count = self._block_count, doc.blockCount()
 
-        while block.isValid():
-            text = block.text()
-            line_num = block.blockNumber()
+        if dirty is None or not self._update_folds_range(dirty, old_count):
+            self._set_fold_regions(self._scan_folds(doc.begin(), None))
 
-            if text.strip():
-                # Calculate indent level
-                indent = len(text) - len(text.lstrip())
-                indent_level = indent // 4  # Assume 4-space tabs
+        self.update()
+
+    def _update_folds_range(self, dirty: tuple, old_count: int) -> bool:
+        """Rescan only the top-level region around an edit.
+
+        Lines with zero indentation close every open region, so folds before the
+        last such line above the edit and from the first such line below it are
+        unaffected (the latter only shift by the change in line count).
+        Returns False when a full rescan is preferable.
+        """
+        doc = self._editor.document()
+        lo_block = doc.findBlock(dirty[0])
+        hi_block = doc.findBlock(min(dirty[1], max(doc.characterCount() - 1, 0)))
+        if not lo_block.isValid() or not hi_block.isValid():
+            return False
+        if hi_block.blockNumber() - lo_block.blockNumber() > self.INCREMENTAL_FOLD_LIMIT:
+            return False
 
-                # Pop stack for regions that end
-                while stack and stack[-1][1] >= indent_level:
-                    start_line, _ = stack.pop()
-                    if line_num > start_line + 1:
-                        self._fold_regions[start_line] = line_num - 1
+        def is_top_level(block):
+            # Mirrors _scan_fold_texts: a non-blank line at indent level 0 pops every region
+            text = block.text()
+            stripped = text.lstrip()
+            return bool(stripped) and (len(text) - len(stripped)) // 4 == 0
+
+        # Anchor strictly above the edit so its (unchanged) line bounds earlier folds
+        anchor = lo_block.previous()
+        while anchor.isValid() and not is_top_level(anchor):
+            anchor = anchor.previous()
+        if not anchor.isValid():
+            anchor = doc.begin()
+
+        stop = hi_block.next()
+        while stop.isValid() and not is_top_level(stop):
+            stop = stop.next()
+        stop_line = stop.blockNumber() if stop.isValid() else None
+
+        first = anchor.blockNumber()
+        delta = doc.blockCount() - old_count
+        old_stop = stop_line - delta if stop_line is not None else None
+
+        starts, ends = self._fold_starts, self._fold_ends
+        head = bisect_left(starts, first)
+        new_starts, new_ends = starts[:head], ends[:head]
+        scanned = self._scan_folds(anchor, stop_line)
+        for start_line in sorted(scanned):
+            new_starts.append(start_line)
+            new_ends.append(scanned[start_line])
+        if old_stop is not None:
+            tail = bisect_left(starts, old_stop)
+            new_starts.extend(start_line + delta for start_line in starts[tail:])
+            new_ends.extend(end_line + delta for end_line in ends[tail:])
+            if delta:
+                self._collapsed = {
+                    line + delta if line >= old_stop else line for line in self._collapsed
+                }
+        self._fold_starts, self._fold_ends = new_starts, new_ends
+        return True
+
+    def _set_fold_regions(self, regions: Dict[int, int]):
+        """Replace all fold regions from a start_line -> end_line mapping."""
+        starts = sorted(regions)
+        self._fold_starts = array('i', starts)
+        self._fold_ends = array('i', (regions[start_line] for start_line in starts))
+
+    def _fold_end(self, start_line: int) -> Optional[int]:
+        """End line of the region starting at start_line, or None."""
+        i = bisect_left(self._fold_starts, start_line)
+        if i < len(self._fold_starts) and self._fold_starts[i] == start_line:
+            return self._fold_ends[i]
+        return None
 
-                # Check if this line starts a fold region (ends with : or { or has high indent)
-                stripped = text.rstrip()
-                if stripped.endswith(':') or stripped.endswith('{'):
-                    stack.append((line_num, indent_level))
+    def _scan_folds(self, block, stop_line: Optional[int]) -> Dict[int, int]:
+        """Scan blocks from `block` up to `stop_line` (exclusive, None = end)."""
+        doc = self._editor.document()
+        first_line = block.blockNumber()
+        close_line = stop_line if stop_line is not None else doc.blockCount()
+
+        texts = None
+        if first_line == 0 and stop_line is None and doc.characterCount() <= self.BULK_FOLD_SCAN_LIMIT:
+            # One plain-text split instead of a QString -> str conversion per block.
+            # toPlainText() turns in-block U+2028 separators into '\n' too, so
+            # the split only lines up with block numbers when the counts agree.
+            texts = self._editor._ensure_plain_cache().split('\n')
+            if len(texts) != close_line:
+                texts = None
+        if texts is None:
+            texts = self._block_texts(block, close_line - first_line)
+        return self._scan_fold_texts(texts, first_line, close_line)
 
+    @staticmethod
+    def _block_texts(block, count: int):
+        """Yield the text of up to `count` blocks starting at `block`."""
+        while count > 0 and block.isValid():
+            yield block.text()
             block = block.next()
+            count -= 1
 
-        # Close any remaining regions at end of file
-        total_lines = doc.blockCount()
+    @staticmethod
+    def _scan_fold_texts(texts, first_line: int, close_line: int) -> Dict[int, int]:
+        """Fold regions for consecutive lines starting at first_line.
+
+        Regions still open at the end are closed just before close_line.
+        """
+        regions: Dict[int, int] = {}
+        stack = []  # Stack of (start_line, indent_level)
+
+        for line_num, text in enumerate(texts, first_line):
+            stripped = text.lstrip()
+            if not stripped:
+                continue
+
+            # Calculate indent level
+            indent_level = (len(text) - len(stripped)) // 4  # Assume 4-space tabs
+
+            # Pop stack for regions that end
+            while stack and stack[-1][1] >= indent_level:
+                start_line, _ = stack.pop()
+                if line_num > start_line + 1:
+                    regions[start_line] = line_num - 1
+
+            # Check if this line starts a fold region (ends with : or {)
+            if stripped.rstrip()[-1] in ':{':
+                stack.append((line_num, indent_level))
+
+        # Close any remaining regions at the stop line (or end of file)
         while stack:
             start_line, _ = stack.pop()
-            if total_lines > start_line + 1:
-                self._fold_regions[start_line] = total_lines - 1
+            if close_line > start_line + 1:
+                regions[start_line] = close_line - 1
 
-        self.update()
+        return regions
 
-    def _update_area(self, rect, dy):
-        """Update folding area when editor scrolls."""
-        if dy:
-            self.scroll(0, dy)
-        else:
-            self.update(0, rect.y(), self.width(), rect.height())
+    def changeEvent(self, event):
+        if event.type() == QEvent.Type.FontChange:
+            self._fm_height = None
+        super().changeEvent(event)
+
+    def _font_height(self) -> int:
+        if self._fm_height is None:
+            self._fm_height = self._editor.fontMetrics().height()
+        return self._fm_height
 
     def paintEvent(self, event):
         """Paint fold markers."""
         painter = QPainter(self)
-        painter.fillRect(event.rect(), QColor(Theme.BG_SECONDARY))
+        painter.fillRect(event.rect(), Theme.qcolor("BG_SECONDARY"))
+        font_height = self._font_height()
 
-        block = self._editor.firstVisibleBlock()
-        block_number = block.blockNumber()
-        top = int(self._editor.blockBoundingGeometry(block).translated(
-            self._editor.contentOffset()).top())
-        bottom = top + int(self._editor.blockBoundingRect(block).height())
+        visible = self._editor.visible_blocks()
+        if not visible:
+            return
 
-        while block.isValid() and top <= event.rect().bottom():
-            if block.isVisible() and bottom >= event.rect().top():
-                line_num = block_number
+        # Walk the sorted starts alongside the blocks, from the first visible one
+        starts = self._fold_starts
+        fold_index = bisect_left(starts, visible[0][0])
+        fold_count = len(starts)
+        rect_top, rect_bottom = event.rect().top(), event.rect().bottom()
 
-                if line_num in self._fold_regions:
-                    # Draw fold marker
-                    is_collapsed = line_num in self._collapsed
-                    self._draw_fold_marker(painter, top, is_collapsed)
+        for line_num, top, bottom in visible:
+            if top > rect_bottom:
+                break
+            while fold_index < fold_count and starts[fold_index] < line_num:
+                fold_index += 1
 
-            block = block.next()
-            top = bottom
-            bottom = top + int(self._editor.blockBoundingRect(block).height())
-            block_number += 1
+            if bottom >= rect_top and fold_index < fold_count and starts[fold_index] == line_num:
+                # Draw fold marker
+                is_collapsed = line_num in self._collapsed
+                self._draw_fold_marker(painter, top, font_height, is_collapsed)
 
-    def _draw_fold_marker(self, painter: QPainter, y: int, collapsed: bool):
+    def _draw_fold_marker(self, painter: QPainter, y: int, font_height: int, collapsed: bool):
         """Draw a fold/unfold marker."""
         size = 9
         x = (self.width() - size) // 2
-        center_y = y + (self._editor.fontMetrics().height() - size) // 2
+        center_y = y + (font_height - size) // 2
 
         # Draw box
-        painter.setPen(QPen(QColor(Theme.TEXT_MUTED), 1))
-        painter.setBrush(QColor(Theme.BG_TERTIARY))
+        painter.setPen(QPen(Theme.qcolor("TEXT_MUTED"), 1))
+        painter.setBrush(Theme.qcolor("BG_TERTIARY"))
         painter.drawRect(x, center_y, size, size)
 
         # Draw + or -
-        painter.setPen(QPen(QColor(Theme.TEXT_PRIMARY), 1))
+        painter.setPen(QPen(Theme.qcolor("TEXT_PRIMARY"), 1))
         mid = size // 2
         painter.drawLine(x + 2, center_y + mid, x + size - 2, center_y + mid)  # Horizontal
         if collapsed:
@@ -5575,20 +5898,11 @@ class FoldingArea(QWidget):
         """Handle click to toggle fold."""
         if event.button() == Qt.MouseButton.LeftButton:
             # Find which line was clicked
-            y = event.position().y()
-            block = self._editor.firstVisibleBlock()
-            top = int(self._editor.blockBoundingGeometry(block).translated(
-                self._editor.contentOffset()).top())
-
-            while block.isValid():
-                height = int(self._editor.blockBoundingRect(block).height())
-                if top <= y < top + height:
-                    line_num = block.blockNumber()
-                    if line_num in self._fold_regions:
-                        self._toggle_fold(line_num)
-                    break
-                top += height
-                block = block.next()
+            block = self._editor.block_at_y(event.position().y())
+            if block is not None:
+                line_num = block.blockNumber()
+                if self._fold_end(line_num) is not None:
+                    self._toggle_fold(line_num)
 
     def _toggle_fold(self, line_num: int):
         """Toggle fold state for a region."""
@@ -5599,10 +5913,10 @@ class FoldingArea(QWidget):
 
     def _fold(self, start_line: int):
         """Collapse a fold region."""
-        if start_line not in self._fold_regions:
+        end_line = self._fold_end(start_line)
+        if end_line is None:
             return
 
-        end_line = self._fold_regions[start_line]
         self._collapsed.add(start_line)
 
         # Hide blocks
@@ -5612,15 +5926,16 @@ class FoldingArea(QWidget):
             block.setVisible(False)
             block = block.next()
 
+        self._editor.invalidate_visible_blocks()
         self._editor.viewport().update()
         self.update()
 
     def _unfold(self, start_line: int):
         """Expand a fold region."""
-        if start_line not in self._fold_regions:
+        end_line = self._fold_end(start_line)
+        if end_line is None:
             return
 
-        end_line = self._fold_regions[start_line]
         self._collapsed.discard(start_line)
 
         # Show blocks
@@ -5630,12 +5945,13 @@ class FoldingArea(QWidget):
             block.setVisible(True)
             block = block.next()
 
+        self._editor.invalidate_visible_blocks()
         self._editor.viewport().update()
         self.update()
 
     def fold_all(self):
         """Collapse all fold regions."""
-        for start_line in self._fold_regions:
+        for start_line in self._fold_starts:
             self._fold(start_line)
 
     def unfold_all(self):
@@ -5644,30 +5960,71 @@ class FoldingArea(QWidget):
             self._unfold(start_line)
 
 
+class _BlameSignals(QObject):
+    """Signals for _BlameWorker (QRunnable is not a QObject)."""
+
+    finished = Signal(int, object)  # generation, line -> {author, date, commit}
+
+
+class _BlameWorker(QRunnable):
+    """Runs git blame and parses it on a QThreadPool thread."""
+
+    def __init__(self, file_path: Path, generation: int):
+        super().__init__()
+        self.signals = _BlameSignals()
+        self._file_path = file_path
+        self._generation = generation
+
+    def run(self):
+        blame_data: Dict[int, dict] = {}
+        try:
+            result = subprocess.run(
+                ["git", "blame", "--line-porcelain", str(self._file_path)],
+                cwd=str(self._file_path.parent),
+                capture_output=True,
+                text=True,
+                timeout=10
+            )
+
+            if result.returncode == 0:
+                blame_data = GitBlameGutter._parse_blame(result.stdout)
+        except Exception:
+            pass
+
+        self.signals.finished.emit(self._generation, blame_data)
+
+
 class GitBlameGutter(QWidget):
     """Gutter widget showing git blame information for each line."""
 
+    # Header line of a porcelain entry: full 40-char commit hash
+    _HASH_RE = re.compile(r'^[0-9a-f]{40}(?:\s|$)')
+
     def __init__(self, editor: 'CodeEditor'):
         super().__init__(editor)
         self._editor = editor
         self._blame_data: Dict[int, dict] = {}  # line -> {author, date, commit}
         self._visible = False
         self._loading = False
+        self._blame_gen = 0  # Bumped per load so stale worker results are dropped
+        self._blame_worker: Optional[_BlameWorker] = None
 
         self.setFixedWidth(0)  # Hidden by default
+        self.setUpdatesEnabled(False)
 
-        # Connect to editor signals
+        # Connect to editor signals (scroll/repaint is driven by CodeEditor)
         self._editor.blockCountChanged.connect(self._update_width)
-        self._editor.updateRequest.connect(self._update_area)
 
     def set_visible(self, visible: bool):
         """Show or hide the blame gutter."""
         self._visible = visible
+        # While hidden, don't even receive (no-op) paint events
+        self.setUpdatesEnabled(visible)
         if visible:
             self._update_width()
+            self.update()
         else:
             self.setFixedWidth(0)
-        self.update()
 
     def load_blame(self, file_path: Path):
         """Load git blame data for the file."""
@@ -5678,26 +6035,26 @@ class GitBlameGutter(QWidget):
         self._blame_data.clear()
         self.update()
 
-        try:
-            result = subprocess.run(
-                ["git", "blame", "--line-porcelain", str(file_path)],
-                cwd=str(file_path.parent),
-                capture_output=True,
-                text=True,
-                timeout=10
-            )
+        self._blame_gen += 1
+        self._blame_worker = _BlameWorker(file_path, self._blame_gen)
+        self._blame_worker.signals.finished.connect(self._on_blame_loaded)
+        QThreadPool.globalInstance().start(self._blame_worker)
 
-            if result.returncode == 0:
-                self._parse_blame(result.stdout)
-        except Exception:
-            pass
+    def _on_blame_loaded(self, generation: int, blame_data: Dict[int, dict]):
+        """Apply parsed blame data from the worker (ignores superseded loads)."""
+        if generation != self._blame_gen:
+            return
 
+        self._blame_worker = None
+        self._blame_data = blame_data
         self._loading = False
         self._update_width()
         self.update()
 
-    def _parse_blame(self, output: str):
+    @classmethod
+    def _parse_blame(cls, output: str) -> Dict[int, dict]:
         """Parse git blame --line-porcelain output."""
+        blame_data: Dict[int, dict] = {}
         lines = output.split('\n')
         current_line = 0
         current_data = {}
@@ -5706,21 +6063,22 @@ class GitBlameGutter(QWidget):
             if line.startswith('\t'):
                 # Content line - save the data
                 current_line += 1
-                self._blame_data[current_line] = current_data.copy()
+                blame_data[current_line] = current_data.copy()
             elif line.startswith('author '):
                 current_data['author'] = line[7:]
             elif line.startswith('author-time '):
                 try:
                     timestamp = int(line[12:])
-                    from datetime import datetime
                     dt = datetime.fromtimestamp(timestamp)
                     current_data['date'] = dt.strftime('%Y-%m-%d')
                 except (ValueError, OSError):
                     current_data['date'] = ''
-            elif len(line) >= 40 and line[:40].replace('0', '').replace('a', '').replace('b', '').replace('c', '').replace('d', '').replace('e', '').replace('f', '') == '':
+            elif cls._HASH_RE.match(line):
                 # Commit hash
                 current_data['commit'] = line[:8]
 
+        return blame_data
+
     def _update_width(self, block_count=None):
         """Update gutter width based on content."""
         if not self._visible:
@@ -5738,23 +6096,16 @@ class GitBlameGutter(QWidget):
         else:
             self.setFixedWidth(100)
 
-    def _update_area(self, rect, dy):
-        """Update gutter area when editor scrolls."""
-        if dy:
-            self.scroll(0, dy)
-        else:
-            self.update(0, rect.y(), self.width(), rect.height())
-
     def paintEvent(self, event):
         """Paint the blame gutter."""
         if not self._visible:
             return
 
         painter = QPainter(self)
-        painter.fillRect(event.rect(), QColor(Theme.BG_SECONDARY))
+        painter.fillRect(event.rect(), Theme.qcolor("BG_SECONDARY"))
 
         if self._loading:
-            painter.setPen(QColor(Theme.TEXT_MUTED))
+            painter.setPen(Theme.qcolor("TEXT_MUTED"))
             painter.drawText(event.rect(), Qt.AlignmentFlag.AlignCenter, "Loading...")
             return
 
@@ -5763,16 +6114,14 @@ class GitBlameGutter(QWidget):
         font.setPointSize(font.pointSize() - 1)
         painter.setFont(font)
 
-        block = self._editor.firstVisibleBlock()
-        block_number = block.blockNumber()
-        top = int(self._editor.blockBoundingGeometry(block).translated(
-            self._editor.contentOffset()).top())
-        bottom = top + int(self._editor.blockBoundingRect(block).height())
-
+        font_height = self._editor.fontMetrics().height()
         last_commit = None
+        rect_top, rect_bottom = event.rect().top(), event.rect().bottom()
 
-        while block.isValid() and top <= event.rect().bottom():
-            if block.isVisible() and bottom >= event.rect().top():
+        for block_number, top, bottom in self._editor.visible_blocks():
+            if top > rect_bottom:
+                break
+            if bottom >= rect_top:
                 line_num = block_number + 1
                 data = self._blame_data.get(line_num, {})
 
@@ -5783,27 +6132,114 @@ class GitBlameGutter(QWidget):
 
                     # Only show if different from previous line (cleaner look)
                     if commit != last_commit:
-                        painter.setPen(QColor(Theme.TEXT_MUTED))
+                        painter.setPen(Theme.qcolor("TEXT_MUTED"))
                         text = f"{author:<12} {date}"
                         painter.drawText(5, top, self.width() - 10,
-                                        self._editor.fontMetrics().height(),
+                                        font_height,
                                         Qt.AlignmentFlag.AlignLeft, text)
                         last_commit = commit
 
-            block = block.next()
-            top = bottom
-            bottom = top + int(self._editor.blockBoundingRect(block).height())
-            block_number += 1
+
+class _SearchSignals(QObject):
+    """Signals for _SearchWorker."""
+
+    finished = Signal(int, object, bool)  # generation, match positions, forward
+
+
+class _SearchWorker(QRunnable):
+    """Finds all matches in a document snapshot off the GUI thread.
+
+    The text is split into chunks that are scanned in parallel; each chunk
+    reads len(text) - 1 characters past its end so boundary matches are found.
+    """
+
+    _chunk_pool: Optional[ThreadPoolExecutor] = None
+
+    def __init__(self, content: str, text: str, case_sensitive: bool,
+                 generation: int, forward: bool, chunk_size: int, edit_gen: int):
+        super().__init__()
+        self.signals = _SearchSignals()
+        self._content = content
+        self.text = text
+        self.case_sensitive = case_sensitive
+        self.edit_gen = edit_gen  # Document edit the snapshot was taken at
+        self._generation = generation
+        self._forward = forward
+        self._chunk_size = chunk_size
+
+    @classmethod
+    def _pool(cls) -> ThreadPoolExecutor:
+        if cls._chunk_pool is None:
+            cls._chunk_pool = ThreadPoolExecutor(
+                max_workers=os.cpu_count() or 4, thread_name_prefix="find")
+        return cls._chunk_pool
+
+    def run(self):
+        content, text = self._content, self.text
+        flags = 0 if self.case_sensitive else re.IGNORECASE
+        # Lookahead yields every (overlapping) start; the merge below keeps the
+        # same non-overlapping set a single finditer over the whole text would
+        pattern = re.compile(f"(?={re.escape(text)})", flags)
+        overlap = len(text) - 1
+        size = len(content)
+
+        def scan(start: int) -> List[int]:
+            end = min(start + self._chunk_size + overlap, size)
+            return [m.start() for m in pattern.finditer(content, start, end)]
+
+        matches: List[int] = []
+        try:
+            next_free = 0
+            for positions in self._pool().map(scan, range(0, size, self._chunk_size)):
+                for pos in positions:
+                    if pos >= next_free:
+                        matches.append(pos)
+                        next_free = pos + len(text)
+        except Exception:
+            matches = []
+
+        self.signals.finished.emit(self._generation, matches, self._forward)
 
 
 class CodeEditor(QPlainTextEdit):
     """Code editor with syntax highlighting and find/replace."""
 
+    search_finished = Signal(int, int)  # current (1-based), total for async searches
+
+    # Documents at least this large are searched off the GUI thread
+    ASYNC_SEARCH_THRESHOLD = 1024 * 1024
+    SEARCH_CHUNK_SIZE = 1024 * 1024
+    REGEX_CACHE_SIZE = 32
+    # Edits touching more characters than this drop find matches instead of remapping
+    REMAP_EDIT_LIMIT = 4096
+
+    # Files at least this large are read in chunks rather than in one go
+    STREAM_LOAD_THRESHOLD = 1024 * 1024
+    STREAM_CHUNK_SIZE = 1024 * 1024
+
     def __init__(self, parent=None):
         super().__init__(parent)
         self.current_file: Optional[Path] = None
-        self._find_matches: List[int] = []  # List of match positions
+        self._find_matches = array('i')  # Sorted match start offsets (compact int32)
         self._current_match = -1
+        self._find_query: Optional[tuple] = None  # (text, case_sensitive) of _find_matches
+        self._find_edit_gen = -1  # _edit_gen the matches were computed against
+        self._search_gen = 0  # Bumped per async search so stale results are dropped
+        self._search_worker: Optional[_SearchWorker] = None
+
+        # (block_number, top, bottom) of visible blocks, shared by all gutter paints
+        self._visible_snapshot: List[tuple] = []
+        self._visible_key: Optional[tuple] = None
+
+        # Compiled literal-search patterns keyed by (text, case_sensitive), LRU order
+        self._regex_cache: OrderedDict = OrderedDict()
+
+        # Plain-text snapshot (and its lowercase copy) for searching, rebuilt lazily
+        self._plain_cache = ''
+        self._plain_lower: Optional[str] = None
+        self._plain_dirty = True
+        self._edit_gen = 0  # Bumped on every document edit
+        self.document().contentsChange.connect(self._invalidate_plain_cache)
         self._blame_visible = False
 
         font = QFont("Consolas", 12)
@@ -5837,6 +6273,9 @@ class CodeEditor(QPlainTextEdit):
         # Git blame gutter
         self.blame_gutter = GitBlameGutter(self)
 
+        # Single updateRequest handler fans out to these, in paint order
+        self._gutters = (self.line_number_area, self.folding_area, self.blame_gutter)
+
         # Update margins and geometry
         self._update_margins()
 
@@ -5851,16 +6290,19 @@ class CodeEditor(QPlainTextEdit):
 
     def _highlight_current_line(self):
         """Update line number area when cursor moves."""
-        self.line_number_area.update()
+        self.line_number_area.current_line_changed(self.textCursor().blockNumber())
 
     def _update_gutter_geometry(self, rect, dy):
-        """Update the position of gutter widgets."""
-        if dy:
-            self.line_number_area.scroll(0, dy)
-            self.folding_area.scroll(0, dy)
-        else:
-            self.line_number_area.update(0, rect.y(), self.line_number_area.width(), rect.height())
-            self.folding_area.update(0, rect.y(), self.folding_area.width(), rect.height())
+        """Scroll or repaint every gutter for one editor updateRequest."""
+        self.invalidate_visible_blocks()
+        for gutter in self._gutters:
+            width = gutter.width()
+            if width == 0:
+                continue  # Hidden (e.g. blame off)
+            if dy:
+                gutter.scroll(0, dy)
+            else:
+                gutter.update(0, rect.y(), width, rect.height())
 
     def resizeEvent(self, event):
         """Handle resize to update gutter geometry."""
@@ -5897,8 +6339,20 @@ class CodeEditor(QPlainTextEdit):
                 if reply != QMessageBox.StandardButton.Yes:
                     return
 
-            content = path.read_text()
-            self.setPlainText(content)
+            # Bulk-load mode: no undo record and no highlighting per insert;
+            # the highlighter runs once when it is re-attached
+            doc = self.document()
+            doc.setUndoRedoEnabled(False)
+            self.highlighter.setDocument(None)
+            try:
+                if file_size < self.STREAM_LOAD_THRESHOLD:
+                    self.setPlainText(path.read_text())
+                else:
+                    self._load_file_streamed(path)
+            finally:
+                self.highlighter.setDocument(doc)
+                doc.clearUndoRedoStacks()
+                doc.setUndoRedoEnabled(True)
             self.current_file = path
 
             # Update syntax highlighter for file type
@@ -5907,9 +6361,53 @@ class CodeEditor(QPlainTextEdit):
         except Exception as e:
             self.setPlainText(f"Error loading file: {e}")
 
+    def _load_file_streamed(self, path: Path):
+        """Load a large file from a read-only mmap, decoding 1 MB at a time.
+
+        Pages fault in on demand and no full-size bytes or str copy is made.
+        Files that are not valid UTF-8 fall back to a lossy read_text().
+        """
+        self.clear()
+        cursor = QTextCursor(self.document())
+        cursor.beginEditBlock()
+        try:
+            try:
+                with open(path, 'rb') as f, \
+                        mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                    # utf-8-sig drops a BOM; newline translation matches text-mode reads
+                    decoder = io.IncrementalNewlineDecoder(
+                        codecs.getincrementaldecoder('utf-8-sig')(), translate=True)
+                    size = len(mm)
+                    for start in range(0, size, self.STREAM_CHUNK_SIZE):
+                        end = start + self.STREAM_CHUNK_SIZE
+                        cursor.insertText(decoder.decode(mm[start:end], final=end >= size))
+            except UnicodeDecodeError:
+                cursor.select(QTextCursor.SelectionType.Document)
+                cursor.insertText(path.read_text(errors='replace'))
+        finally:
+            cursor.endEditBlock()
+
     def save_file(self):
         if self.current_file:
-            self.current_file.write_text(self.toPlainText())
+            with self.current_file.open('w') as f:
+                f.writelines(self.iter_text())
+
+    # block.text() keeps the separators toPlainText() normalises away
+    _PLAIN_TEXT_TABLE = str.maketrans({'\u2028': '\n', '\u2029': '\n', '\xa0': ' '})
+
+    def iter_text(self):
+        """Yield the document text block by block, with '\n' between blocks.
+
+        Lets callers stream the text (to disk, into a hash) without building
+        the full toPlainText() copy. Output matches toPlainText().
+        """
+        table = self._PLAIN_TEXT_TABLE
+        block = self.document().begin()
+        while block.isValid():
+            yield block.text().translate(table)
+            block = block.next()
+            if block.isValid():
+                yield '\n'
 
     def toggle_blame(self):
         """Toggle git blame gutter visibility."""
@@ -5932,20 +6430,232 @@ class CodeEditor(QPlainTextEdit):
         """Check if git blame is currently visible."""
         return self._blame_visible
 
+    def invalidate_visible_blocks(self):
+        """Drop the visible-block snapshot (scroll, relayout, fold changes)."""
+        self._visible_key = None
+
+    def visible_blocks(self) -> List[tuple]:
+        """(block_number, top, bottom) for each visible block in the viewport.
+
+        Computed once and shared by the gutters until the viewport scrolls,
+        resizes, the document changes, or invalidate_visible_blocks() is called.
+        """
+        block = self.firstVisibleBlock()
+        viewport = self.viewport()
+        key = (block.blockNumber(), self.contentOffset().y(), viewport.width(),
+               viewport.height(), self.document().revision())
+        if key == self._visible_key:
+            return self._visible_snapshot
+
+        snapshot = []
+        height = viewport.height()
+        top = int(self.blockBoundingGeometry(block).translated(self.contentOffset()).top())
+        while block.isValid() and top <= height:
+            bottom = top + int(self.blockBoundingRect(block).height())
+            if block.isVisible():
+                snapshot.append((block.blockNumber(), top, bottom))
+            block = block.next()
+            top = bottom
+
+        self._visible_snapshot = snapshot
+        self._visible_key = key
+        return snapshot
+
+    def block_at_y(self, y: float):
+        """Return the visible block at viewport y, or None if y is past the text.
+
+        Uses the layout index via cursorForPosition instead of walking blocks.
+        """
+        block = self.cursorForPosition(QPoint(0, int(y))).block()
+        if not block.isValid():
+            return None
+        top = self.blockBoundingGeometry(block).translated(self.contentOffset()).top()
+        if top <= y < top + self.blockBoundingRect(block).height():
+            return block
+        return None
+
     def find_text(self, text: str, case_sensitive: bool = False, forward: bool = True) -> tuple:
         """Find text and return (current_index, total_matches)."""
         if not text:
-            self._find_matches = []
+            self._find_matches = array('i')
+            self._find_query = None
             self._current_match = -1
             return (0, 0)
 
-        # Build regex flags
-        flags = 0 if case_sensitive else re.IGNORECASE
+        self._find_matches = self._find_positions(text, case_sensitive)
+        self._find_query = (text, case_sensitive)
+        self._find_edit_gen = self._edit_gen
+
+        return self._select_from_cursor(text, forward)
+
+    def _invalidate_plain_cache(self, position: int = 0, removed: int = 0, added: int = 0):
+        self._plain_dirty = True
+        self._edit_gen += 1
+        # Keep find matches current across the edit when that is cheap
+        if (self._find_query is not None and self._find_edit_gen == self._edit_gen - 1
+                and self._remap_find_matches(position, removed, added)):
+            self._find_edit_gen = self._edit_gen
+
+    def _remap_find_matches(self, position: int, removed: int, added: int) -> bool:
+        """Shift matches past an edit and rescan only the text around it.
+
+        Only done for needles whose occurrences cannot overlap, where the
+        match list is simply every occurrence. Returns False if not remapped.
+        """
+        text, case_sensitive = self._find_query
+        length = len(text)
+        needle = text if case_sensitive else text.lower()
+        if (removed + added > self.REMAP_EDIT_LIMIT or len(needle) != length
+                or self._self_overlaps(needle)):
+            return False
+
+        # Rescan from the first start that could reach into the edit to the
+        # last start that could include inserted text
+        lo = max(0, position - length + 1)
+        hi = min(position + added + length - 1, self.document().characterCount() - 1)
+        window = self._document_text(lo, hi)
+        if not case_sensitive:
+            lowered = window.lower()
+            if len(lowered) != len(window):
+                return False
+            window = lowered
+
+        matches = self._find_matches
+        remapped = array('i', matches[:bisect_right(matches, position - length)])
+        i = window.find(needle)
+        while i != -1:
+            remapped.append(lo + i)
+            i = window.find(needle, i + length)
+        delta = added - removed
+        remapped.extend(pos + delta for pos in matches[bisect_left(matches, position + removed):])
+
+        self._find_matches = remapped
+        self._current_match = -1
+        return True
+
+    def _document_text(self, start: int, end: int) -> str:
+        """Plain text of [start, end) without copying the whole document."""
+        cursor = QTextCursor(self.document())
+        cursor.setPosition(start)
+        cursor.setPosition(end, QTextCursor.MoveMode.KeepAnchor)
+        # selectedText() keeps the separators toPlainText() converts
+        return (cursor.selectedText().replace('\u2029', '\n')
+                .replace('\u2028', '\n').replace('\xa0', ' '))
+
+    def _ensure_plain_cache(self) -> str:
+        """Return the document text, re-reading it only after an edit.
+
+        Find, replace-all, async search and fold scanning all share this copy
+        instead of each rebuilding it with toPlainText().
+        """
+        if self._plain_dirty:
+            self._plain_cache = self.toPlainText()
+            self._plain_lower = None
+            self._plain_dirty = False
+        return self._plain_cache
+
+    def _find_positions(self, text: str, case_sensitive: bool) -> array:
+        """Start offsets of non-overlapping occurrences of text."""
+        content = self._ensure_plain_cache()
+        if case_sensitive:
+            haystack, needle = content, text
+        else:
+            if self._plain_lower is None:
+                self._plain_lower = content.lower()
+            haystack, needle = self._plain_lower, text.lower()
+            if len(haystack) != len(content) or len(needle) != len(text):
+                # Lowercasing changed lengths (rare Unicode); offsets would drift
+                return array('i', (m.start() for m in self._search_pattern(text, False).finditer(content)))
+
+        positions = array('i')
+        step = len(needle)
+
+        if self._can_refine_matches(text, case_sensitive):
+            # Typing extended the query: every occurrence of it is one of the
+            # previous (exhaustive) matches, so filter instead of rescanning
+            next_free = -1
+            for pos in self._find_matches:
+                if pos >= next_free and haystack.startswith(needle, pos):
+                    positions.append(pos)
+                    next_free = pos + step
+            return positions
+
+        i = haystack.find(needle)
+        while i != -1:
+            positions.append(i)
+            i = haystack.find(needle, i + step)
+        return positions
+
+    def _can_refine_matches(self, text: str, case_sensitive: bool) -> bool:
+        """Whether the matches for text can be filtered from the current ones."""
+        previous = self._find_query
+        if (previous is None or previous[1] != case_sensitive
+                or self._find_edit_gen != self._edit_gen):
+            return False
+        prev_needle, needle = previous[0], text
+        if not case_sensitive:
+            prev_needle, needle = prev_needle.lower(), needle.lower()
+        return (len(needle) > len(prev_needle) and needle.startswith(prev_needle)
+                and not self._self_overlaps(prev_needle))
+
+    @staticmethod
+    def _self_overlaps(needle: str) -> bool:
+        """Whether occurrences of needle can overlap (a proper prefix is also a suffix).
+
+        Only for needles that cannot overlap does the non-overlapping scan list
+        every occurrence.
+        """
+        return any(needle.startswith(needle[k:]) for k in range(1, len(needle)))
+
+    def _search_pattern(self, text: str, case_sensitive: bool) -> re.Pattern:
+        """Compiled pattern for a literal search, reused across keystrokes."""
+        key = (text, case_sensitive)
+        pattern = self._regex_cache.get(key)
+        if pattern is None:
+            flags = 0 if case_sensitive else re.IGNORECASE
+            pattern = self._regex_cache[key] = re.compile(re.escape(text), flags)
+            if len(self._regex_cache) > self.REGEX_CACHE_SIZE:
+                self._regex_cache.popitem(last=False)
+        else:
+            self._regex_cache.move_to_end(key)
+        return pattern
+
+    def needs_async_search(self, text: str, case_sensitive: bool) -> bool:
+        """Whether a new search for text would be run by find_all_async."""
+        return (bool(text) and not self._has_current_matches(text, case_sensitive)
+                and self.document().characterCount() >= self.ASYNC_SEARCH_THRESHOLD
+                and not self._can_refine_matches(text, case_sensitive))
+
+    def find_all_async(self, text: str, case_sensitive: bool = False, forward: bool = True):
+        """Search a snapshot of the document on the thread pool.
+
+        The result is selected like find_text and reported via search_finished.
+        """
+        self._search_gen += 1
+        self._find_matches = array('i')
+        self._find_query = None
+        self._current_match = -1
 
-        # Find all matches
-        content = self.toPlainText()
-        self._find_matches = [m.start() for m in re.finditer(re.escape(text), content, flags)]
+        self._search_worker = _SearchWorker(
+            self._ensure_plain_cache(), text, case_sensitive, self._search_gen,
+            forward, self.SEARCH_CHUNK_SIZE, self._edit_gen)
+        self._search_worker.signals.finished.connect(self._on_search_finished)
+        QThreadPool.globalInstance().start(self._search_worker)
 
+    def _on_search_finished(self, generation: int, matches: List[int], forward: bool):
+        """Apply async search results unless a newer search superseded them."""
+        worker = self._search_worker
+        if generation != self._search_gen or worker is None:
+            return
+        self._search_worker = None
+        self._find_matches = array('i', matches)
+        self._find_query = (worker.text, worker.case_sensitive)
+        self._find_edit_gen = worker.edit_gen
+        current, total = self._select_from_cursor(worker.text, forward)
+        self.search_finished.emit(current, total)
+
+    def _select_from_cursor(self, text: str, forward: bool) -> tuple:
+        """Pick the match nearest the cursor, select it, return (current, total)."""
         if not self._find_matches:
             self._current_match = -1
             return (0, 0)
@@ -5953,30 +6663,27 @@ class CodeEditor(QPlainTextEdit):
         # Find next match from cursor
         cursor_pos = self.textCursor().position()
 
+        # Matches are sorted, so the first one at/after the cursor is a bisect away
+        i = bisect_left(self._find_matches, cursor_pos)
         if forward:
-            # Find first match after cursor
-            for i, pos in enumerate(self._find_matches):
-                if pos >= cursor_pos:
-                    self._current_match = i
-                    break
-            else:
-                self._current_match = 0  # Wrap to start
+            # First match after cursor, else wrap to start
+            self._current_match = i if i < len(self._find_matches) else 0
         else:
-            # Find last match before cursor
-            for i in range(len(self._find_matches) - 1, -1, -1):
-                if self._find_matches[i] < cursor_pos:
-                    self._current_match = i
-                    break
-            else:
-                self._current_match = len(self._find_matches) - 1  # Wrap to end
+            # Last match before cursor, else wrap to end
+            self._current_match = i - 1 if i > 0 else len(self._find_matches) - 1
 
         # Select the match
         self._select_match(text)
         return (self._current_match + 1, len(self._find_matches))
 
+    def _has_current_matches(self, text: str, case_sensitive: bool) -> bool:
+        """Whether _find_matches belongs to this query and the current text."""
+        return (self._find_query == (text, case_sensitive)
+                and self._find_edit_gen == self._edit_gen)
+
     def find_next(self, text: str, case_sensitive: bool = False) -> tuple:
         """Find next occurrence."""
-        if not self._find_matches or not text:
+        if not self._find_matches or not self._has_current_matches(text, case_sensitive):
             return self.find_text(text, case_sensitive, forward=True)
 
         self._current_match = (self._current_match + 1) % len(self._find_matches)
@@ -5985,7 +6692,7 @@ class CodeEditor(QPlainTextEdit):
 
     def find_prev(self, text: str, case_sensitive: bool = False) -> tuple:
         """Find previous occurrence."""
-        if not self._find_matches or not text:
+        if not self._find_matches or not self._has_current_matches(text, case_sensitive):
             return self.find_text(text, case_sensitive, forward=False)
 
         self._current_match = (self._current_match - 1) % len(self._find_matches)
@@ -6010,6 +6717,9 @@ class CodeEditor(QPlainTextEdit):
             match = selected == find_text if case_sensitive else selected.lower() == find_text.lower()
             if match:
                 cursor.insertText(replace_text)
+                if self._has_current_matches(find_text, case_sensitive):
+                    # Matches were remapped across the edit; just move on
+                    return self._select_from_cursor(find_text, forward=True)
                 # Re-find to update matches
                 return self.find_text(find_text, case_sensitive, forward=True)
         return (self._current_match + 1 if self._current_match >= 0 else 0, len(self._find_matches))
@@ -6019,17 +6729,43 @@ class CodeEditor(QPlainTextEdit):
         if not find_text:
             return 0
 
-        flags = 0 if case_sensitive else re.IGNORECASE
-        content = self.toPlainText()
-        new_content, count = re.subn(re.escape(find_text), replace_text, content, flags=flags)
-
-        if count > 0:
-            cursor = self.textCursor()
-            cursor.beginEditBlock()
-            self.setPlainText(new_content)
-            cursor.endEditBlock()
-            self._find_matches = []
-            self._current_match = -1
+        content = self._ensure_plain_cache()
+        if case_sensitive:
+            # Plain substring replace; no regex machinery for a literal query
+            count = content.count(find_text)
+            if not count:
+                return 0
+            new_content = content.replace(find_text, replace_text)
+        else:
+            positions = self._find_positions(find_text, case_sensitive)
+            count = len(positions)
+            if not count:
+                return 0
+            parts = []
+            prev = 0
+            for pos in positions:
+                parts.append(content[prev:pos])
+                parts.append(replace_text)
+                prev = pos + len(find_text)
+            parts.append(content[prev:])
+            new_content = ''.join(parts)
+
+        # Swap the text in one edit block rather than setPlainText, so the
+        # replacement is a single undo step and the view keeps its place
+        caret = self.textCursor().position()
+        scroll = self.verticalScrollBar().value()
+        cursor = QTextCursor(self.document())
+        cursor.beginEditBlock()
+        cursor.select(QTextCursor.SelectionType.Document)
+        cursor.insertText(new_content)
+        cursor.endEditBlock()
+
+        cursor.setPosition(min(caret, self.document().characterCount() - 1))
+        self.setTextCursor(cursor)
+        self.verticalScrollBar().setValue(scroll)
+        self._find_matches = array('i')
+        self._find_query = None
+        self._current_match = -1
 
         return count
 
@@ -6051,8 +6787,36 @@ class Minimap(QWidget):
         'default': '#9CDCFE',      # Light blue - default
     }
 
+    # Minimap tokenizer: quoted string (closing quote optional), word (plus whether
+    # a "(" follows), or any other single non-space character
+    TOKEN_RE = re.compile(
+        r"""(?P<string>"(?:\\.?|[^"\\])*"?|'(?:\\.?|[^'\\])*'?)"""
+        r"""|(?P<word>\w+)(?=(?P<call>\s*\()?)"""
+        r"""|(?P<op>\S)"""
+    )
+
+    KEYWORDS = frozenset({
+        'def', 'class', 'if', 'else', 'elif', 'for', 'while', 'try', 'except',
+        'finally', 'with', 'as', 'import', 'from', 'return', 'yield', 'raise',
+        'break', 'continue', 'pass', 'lambda', 'and', 'or', 'not', 'in', 'is',
+        'True', 'False', 'None', 'self', 'function', 'const', 'let', 'var',
+        'async', 'await', 'export', 'default', 'new', 'this',
+    })
+
+    LAYOUT_CACHE_SIZE = 8192  # Distinct line texts kept by _line_layout
+    MIN_TOKENIZED_WIDTH = 4   # Lines narrower than this (px) are drawn untokenized
+
+    # Edge bar colors; other git change types are deletions (red), other
+    # diagnostics are info/hints (blue)
+    GIT_COLORS = {'added': '#4EC9B0', 'modified': '#569CD6'}
+    DIAGNOSTIC_COLORS = {'error': '#F14C4C', 'warning': '#CCA700'}
+
+    # Live minimaps; their code layers bake in theme colors (see _on_theme_changed)
+    _instances: 'weakref.WeakSet[Minimap]' = weakref.WeakSet()
+
     def __init__(self, editor: QPlainTextEdit, parent=None):
         super().__init__(parent)
+        Minimap._instances.add(self)
         self._editor = editor
         self._char_width = 0.8  # Scale factor for character width
         self._line_height = 2   # Height of each line in minimap
@@ -6060,13 +6824,19 @@ class Minimap(QWidget):
         self._viewport_bottom = 0
         self._dragging = False
         self._hover_line = -1
-        self._search_highlights: List[int] = []  # Lines with search matches
+        self._search_highlights: frozenset = frozenset()  # Lines with search matches
         self._git_changes: Dict[int, str] = {}   # line -> 'added'|'modified'|'deleted'
         self._diagnostics: Dict[int, str] = {}   # line -> 'error'|'warning'|'info'
+        self._git_rows: List[tuple] = []         # (QColor, rows), see _rows_by_color
+        self._diagnostic_rows: List[tuple] = []
         self._selection_start = -1
         self._selection_end = -1
-        self._cached_pixmap = None
+        self._cached_pixmap: Optional[QPixmap] = None  # Code layer, see paintEvent
+        self._cached_line_count = 0  # Lines rendered into the pixmap
+        self._cached_content_bottom = 2  # y just below the last rendered line
         self._cache_valid = False
+        self._layout_cache: Dict[str, tuple] = {}  # stripped line -> _line_layout
+        self._word_classes: Dict[str, str] = {}    # word (not a call) -> token type
 
         self.setFixedWidth(90)
         self.setMinimumHeight(100)
@@ -6084,6 +6854,29 @@ class Minimap(QWidget):
         self._cache_valid = False
         self.update()
 
+    @classmethod
+    def _on_theme_changed(cls):
+        """Re-render every minimap's code layer in the new theme colors."""
+        for minimap in list(cls._instances):
+            minimap._invalidate_cache()
+
+    def _line_layout(self, stripped: str) -> tuple:
+        """(pixel width, token type) per colored segment of a stripped line, memoized.
+
+        A keystroke invalidates the code layer, but nearly every visible line is
+        unchanged, so re-rendering reuses the tokenized layout for its text.
+        """
+        layout = self._layout_cache.get(stripped)
+        if layout is None:
+            char_width = self._char_width
+            layout = tuple((int(length * char_width), token_type)
+                           for length, token_type in self._tokenize_line(stripped))
+            if len(self._layout_cache) >= self.LAYOUT_CACHE_SIZE:
+                self._layout_cache.clear()
+                self._word_classes.clear()
+            self._layout_cache[stripped] = layout
+        return layout
+
     def _on_cursor_changed(self):
         """Handle cursor position change."""
         self.update()
@@ -6103,19 +6896,30 @@ class Minimap(QWidget):
 
     def set_search_highlights(self, lines: List[int]):
         """Set lines that contain search matches."""
-        self._search_highlights = lines
+        self._search_highlights = frozenset(lines)
         self._invalidate_cache()
 
     def set_git_changes(self, changes: Dict[int, str]):
         """Set git diff indicators."""
         self._git_changes = changes
+        self._git_rows = self._rows_by_color(changes, self.GIT_COLORS, "#F14C4C")
         self._invalidate_cache()
 
     def set_diagnostics(self, diagnostics: Dict[int, str]):
         """Set error/warning indicators. diagnostics maps line -> 'error'|'warning'|'info'"""
         self._diagnostics = diagnostics
+        self._diagnostic_rows = self._rows_by_color(diagnostics, self.DIAGNOSTIC_COLORS, "#3794FF")
         self._invalidate_cache()
 
+    @staticmethod
+    def _rows_by_color(markers: Dict[int, str], colors: Dict[str, str],
+                       fallback: str) -> List[tuple]:
+        """Group 1-based marker lines into (QColor, 0-based minimap rows) per bar color."""
+        by_hex: Dict[str, List[int]] = {}
+        for line, kind in markers.items():
+            by_hex.setdefault(colors.get(kind, fallback), []).append(line - 1)
+        return [(QColor(hex_color), rows) for hex_color, rows in by_hex.items()]
+
     def _update_viewport(self):
         """Update the viewport indicator position."""
         scrollbar = self._editor.verticalScrollBar()
@@ -6143,150 +6947,56 @@ class Minimap(QWidget):
         """Get the total content height in minimap coordinates."""
         return self._editor.document().blockCount() * (self._line_height + 1)
 
-    def _classify_token(self, text: str, pos: int) -> str:
-        """Simple token classification for syntax coloring."""
-        # Check if we're in a string
-        in_string = False
-        string_char = None
-        for i, char in enumerate(text[:pos]):
-            if char in ('"', "'") and (i == 0 or text[i-1] != '\\'):
-                if not in_string:
-                    in_string = True
-                    string_char = char
-                elif char == string_char:
-                    in_string = False
-        if in_string:
-            return 'string'
-
-        # Check for comment
-        stripped = text.lstrip()
-        if stripped.startswith('#') or stripped.startswith('//'):
-            return 'comment'
-
-        # Extract the word at position
-        start = pos
-        while start > 0 and (text[start-1].isalnum() or text[start-1] == '_'):
-            start -= 1
-        end = pos
-        while end < len(text) and (text[end].isalnum() or text[end] == '_'):
-            end += 1
-        word = text[start:end]
-
-        # Python/JS keywords
-        keywords = {'def', 'class', 'if', 'else', 'elif', 'for', 'while', 'try', 'except',
-                   'finally', 'with', 'as', 'import', 'from', 'return', 'yield', 'raise',
-                   'break', 'continue', 'pass', 'lambda', 'and', 'or', 'not', 'in', 'is',
-                   'function', 'const', 'let', 'var', 'async', 'await', 'export', 'default'}
-        if word in keywords:
-            return 'keyword'
+    def paintEvent(self, event):
+        """Paint the enhanced minimap.
 
-        # Check if it looks like a function call
-        if end < len(text) and text[end] == '(':
-            return 'function'
+        The code layer (git/diagnostic bars, search hits, syntax) is rendered
+        into a pixmap once per document change; cursor, selection, hover and
+        viewport overlays are drawn live on top of it.
+        """
+        if (not self._cache_valid or self._cached_pixmap is None
+                or self._cached_pixmap.deviceIndependentSize().toSize() != self.size()):
+            self._render_code_layer_to_pixmap()
 
-        # Check if it looks like a class name (starts with uppercase)
-        if word and word[0].isupper():
-            return 'class'
+        painter = QPainter(self)
+        painter.drawPixmap(0, 0, self._cached_pixmap)
 
-        # Check for numbers
-        if word.isdigit() or (word.startswith('0x') and len(word) > 2):
-            return 'number'
-
-        return 'default'
-
-    def paintEvent(self, event):
-        """Paint the enhanced minimap."""
-        painter = QPainter(self)
-        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
-
-        # Background with subtle left border
-        painter.fillRect(self.rect(), QColor(Theme.BG_DARK))
-
-        # Left border separator
-        painter.setPen(QPen(QColor(Theme.BORDER), 1))
-        painter.drawLine(0, 0, 0, self.height())
-
-        # Draw code representation
         doc = self._editor.document()
-        block = doc.begin()
-        y = 2  # Top padding
-
         cursor_line = self._editor.textCursor().blockNumber()
         total_lines = doc.blockCount()
-
-        # Calculate scale factor to fit content
-        content_height = total_lines * (self._line_height + 1)
-        scale = min(1.0, (self.height() - 4) / max(content_height, 1))
-
-        while block.isValid() and y < self.height():
-            line_num = block.blockNumber()
-            text = block.text()
-
-            # Git change indicator on left edge
-            if line_num + 1 in self._git_changes:
-                change_type = self._git_changes[line_num + 1]
-                if change_type == 'added':
-                    git_color = QColor("#4EC9B0")
-                elif change_type == 'modified':
-                    git_color = QColor("#569CD6")
-                else:
-                    git_color = QColor("#F14C4C")
-                painter.fillRect(1, int(y), 2, self._line_height, git_color)
-
-            # Diagnostic indicator on right edge (errors=red, warnings=yellow, info=blue)
-            if line_num + 1 in self._diagnostics:
-                diag_type = self._diagnostics[line_num + 1]
-                if diag_type == 'error':
-                    diag_color = QColor("#F14C4C")  # Red for errors
-                elif diag_type == 'warning':
-                    diag_color = QColor("#CCA700")  # Yellow/orange for warnings
-                else:
-                    diag_color = QColor("#3794FF")  # Blue for info/hints
-                # Draw on right edge as a small rectangle
-                painter.fillRect(self.width() - 6, int(y), 4, self._line_height, diag_color)
-
-            # Search highlight (full width yellow background)
-            if line_num + 1 in self._search_highlights:
-                painter.fillRect(4, int(y), self.width() - 8, self._line_height,
-                               QColor(255, 200, 0, 60))
-
-            # Selection highlight
-            if self._selection_start >= 0 and self._selection_start <= line_num <= self._selection_end:
-                painter.fillRect(4, int(y), self.width() - 8, self._line_height,
-                               QColor(Theme.ACCENT_BLUE).lighter(150))
-
-            # Current line highlight
-            if line_num == cursor_line:
-                painter.fillRect(4, int(y) - 1, self.width() - 8, self._line_height + 2,
-                               QColor(Theme.ACCENT_BLUE))
-
-            # Hover line highlight
-            if line_num == self._hover_line and line_num != cursor_line:
-                painter.fillRect(4, int(y), self.width() - 8, self._line_height,
-                               QColor(255, 255, 255, 20))
-
-            # Draw code with syntax coloring
-            if text.strip():
-                indent = len(text) - len(text.lstrip())
-                x = 6 + int(indent * self._char_width)
-
-                # Analyze text and draw colored segments
-                segments = self._tokenize_line(text.strip())
-                for seg_text, token_type in segments:
-                    color = QColor(self.SYNTAX_COLORS.get(token_type, self.SYNTAX_COLORS['default']))
-                    if line_num != cursor_line:
-                        color.setAlpha(180)  # Slightly transparent for non-current lines
-                    seg_width = int(len(seg_text) * self._char_width)
-                    if seg_width > 0 and x < self.width() - 4:
-                        painter.fillRect(int(x), int(y), min(seg_width, self.width() - x - 4),
-                                       self._line_height, color)
-                    x += seg_width
-
-            y += self._line_height + 1
-            block = block.next()
+        row_height = self._line_height + 1
+        drawn_lines = self._cached_line_count
+
+        # Selection highlight (re-draw the code on top of the fill)
+        if self._selection_start >= 0:
+            selection_color = QColor(Theme.ACCENT_BLUE).lighter(150)
+            last = min(self._selection_end, drawn_lines - 1)
+            block = doc.findBlockByNumber(self._selection_start)
+            code_rects: Dict[str, List[QRect]] = {}
+            for line_num in range(self._selection_start, last + 1):
+                y = 2 + line_num * row_height
+                painter.fillRect(4, y, self.width() - 8, self._line_height, selection_color)
+                if line_num != cursor_line:
+                    self._collect_line_code(block.text(), y, code_rects)
+                block = block.next()
+            self._draw_code_rects(painter, code_rects, 180)
+
+        # Current line highlight
+        if 0 <= cursor_line < drawn_lines:
+            y = 2 + cursor_line * row_height
+            painter.fillRect(4, y - 1, self.width() - 8, self._line_height + 2,
+                           QColor(Theme.ACCENT_BLUE))
+            code_rects = {}
+            self._collect_line_code(doc.findBlockByNumber(cursor_line).text(), y, code_rects)
+            self._draw_code_rects(painter, code_rects, 255)
+
+        # Hover line highlight
+        if 0 <= self._hover_line < drawn_lines and self._hover_line != cursor_line:
+            painter.fillRect(4, 2 + self._hover_line * row_height, self.width() - 8,
+                           self._line_height, QColor(255, 255, 255, 20))
 
         # Draw viewport indicator
-        max_y = y
+        max_y = self._cached_content_bottom
         if total_lines > 0:
             scrollbar = self._editor.verticalScrollBar()
             visible_lines = max(1, self._editor.viewport().height() // max(1, self._editor.fontMetrics().height()))
@@ -6315,88 +7025,153 @@ class Minimap(QWidget):
             self._viewport_top = viewport_top
             self._viewport_bottom = viewport_top + viewport_height
 
-    def _tokenize_line(self, text: str) -> List[tuple]:
-        """Simple tokenization for syntax coloring."""
-        if not text:
-            return []
+    def _render_code_layer_to_pixmap(self):
+        """Render background, git/diagnostic bars, search hits and code into the cache."""
+        ratio = self.devicePixelRatioF()
+        pixmap = QPixmap(self.size() * ratio)
+        pixmap.setDevicePixelRatio(ratio)
+        painter = QPainter(pixmap)
 
-        segments = []
+        # Background with subtle left border
+        painter.fillRect(self.rect(), QColor(Theme.BG_DARK))
 
-        # Check for full-line comment
-        if text.startswith('#') or text.startswith('//'):
-            return [(text, 'comment')]
+        # Left border separator
+        painter.setPen(QPen(QColor(Theme.BORDER), 1))
+        painter.drawLine(0, 0, 0, self.height())
 
-        # Simple tokenization
-        i = 0
-        current_segment = ""
-        current_type = "default"
+        # The minimap maps line N to row N from the top, so only the first
+        # visible_rows blocks can land inside the widget.
+        row_height = self._line_height + 1
+        visible_rows = max(0, (self.height() - 2 + row_height - 1) // row_height)
+        row_limit = min(visible_rows, self._editor.document().blockCount())
 
-        while i < len(text):
-            char = text[i]
-
-            # String detection
-            if char in ('"', "'"):
-                if current_segment:
-                    segments.append((current_segment, current_type))
-                quote = char
-                string_content = char
-                i += 1
-                while i < len(text):
-                    string_content += text[i]
-                    if text[i] == quote and (len(string_content) < 2 or text[i-1] != '\\'):
-                        i += 1
-                        break
-                    i += 1
-                segments.append((string_content, 'string'))
-                current_segment = ""
-                current_type = "default"
-                continue
+        # Git change bars on the left edge, diagnostics on the right edge, then
+        # search hits (full width yellow); rows were grouped by color on set
+        painter.setPen(Qt.PenStyle.NoPen)
+        for rows_by_color, x, width in ((self._git_rows, 1, 2),
+                                        (self._diagnostic_rows, self.width() - 6, 4)):
+            for color, rows in rows_by_color:
+                painter.setBrush(color)
+                painter.drawRects([QRect(x, 2 + row * row_height, width, self._line_height)
+                                   for row in rows if 0 <= row < row_limit])
+        painter.setBrush(QColor(255, 200, 0, 60))
+        painter.drawRects([QRect(4, 2 + (line - 1) * row_height, self.width() - 8, self._line_height)
+                           for line in self._search_highlights if 0 < line <= row_limit])
+        painter.setBrush(Qt.BrushStyle.NoBrush)
+
+        # Draw code representation (segments are batched per token type)
+        block = self._editor.document().begin()
+        y = 2  # Top padding
+        line_count = 0
+        code_rects: Dict[str, List[QRect]] = {}
 
-            # Word characters
-            if char.isalnum() or char == '_':
-                current_segment += char
-            else:
-                if current_segment:
-                    # Classify the word
-                    word_type = self._classify_word(current_segment, text, i - len(current_segment))
-                    segments.append((current_segment, word_type))
-                    current_segment = ""
+        while block.isValid() and line_count < visible_rows:
+            text = block.text()
+            if text:
+                self._collect_line_code(text, y, code_rects)
 
-                # Add the non-word character
-                if char.strip():
-                    segments.append((char, 'operator'))
+            y += row_height
+            block = block.next()
+            line_count += 1
 
-            i += 1
+        # Code with syntax coloring (slightly transparent; the current line is
+        # re-drawn opaque as an overlay)
+        self._draw_code_rects(painter, code_rects, 180)
+
+        painter.end()
+        self._cached_pixmap = pixmap
+        self._cached_line_count = line_count
+        self._cached_content_bottom = y
+        self._cache_valid = True
+
+    def _collect_line_code(self, text: str, y: int, rects: Dict[str, List[QRect]]):
+        """Add one line's syntax-colored segment rects at row y, keyed by token type."""
+        stripped = text.strip()
+        if not stripped:
+            return
+
+        indent = len(text) - len(text.lstrip())
+        x = 6 + int(indent * self._char_width)
+        right = self.width() - 4
+
+        # Too short for the token colors to be told apart: one plain segment
+        line_width = len(stripped) * self._char_width
+        if line_width < self.MIN_TOKENIZED_WIDTH:
+            width = min(int(line_width), right - x)
+            if width > 0:
+                rects.setdefault('default', []).append(QRect(x, int(y), width, self._line_height))
+            return
 
-        # Add remaining segment
-        if current_segment:
-            word_type = self._classify_word(current_segment, text, len(text) - len(current_segment))
-            segments.append((current_segment, word_type))
+        # Lay out colored segments (tokenized once per distinct line text)
+        for seg_width, token_type in self._line_layout(stripped):
+            if x >= right:
+                break
+            if seg_width > 0:
+                rects.setdefault(token_type, []).append(
+                    QRect(int(x), int(y), min(seg_width, right - x), self._line_height))
+            x += seg_width
+
+    def _draw_code_rects(self, painter: QPainter, rects: Dict[str, List[QRect]], alpha: int):
+        """Fill collected segment rects with one brush and drawRects call per color."""
+        painter.setPen(Qt.PenStyle.NoPen)
+        for token_type, token_rects in rects.items():
+            color = QColor(self.SYNTAX_COLORS.get(token_type, self.SYNTAX_COLORS['default']))
+            color.setAlpha(alpha)
+            painter.setBrush(color)
+            painter.drawRects(token_rects)
+        painter.setBrush(Qt.BrushStyle.NoBrush)
+
+    def _tokenize_line(self, text: str) -> List[tuple]:
+        """Simple tokenization for syntax coloring: (length, token type) per token.
+
+        One regex scan per line; the match's lastgroup picks the token type, so
+        only words are sliced out of the line (to be classified).
+        """
+        if not text:
+            return []
+
+        # Check for full-line comment
+        if text.startswith('#') or text.startswith('//'):
+            return [(len(text), 'comment')]
+
+        segments = []
+        append = segments.append
+        classify = self._classify_word
+        word_classes = self._word_classes
+        for m in self.TOKEN_RE.finditer(text):
+            kind = m.lastgroup
+            start, end = m.span()
+            if kind == 'op':
+                append((1, 'operator'))
+            elif kind == 'word':
+                # Identifiers repeat heavily across a file; classify each once
+                word = text[start:end]
+                token_type = word_classes.get(word)
+                if token_type is None:
+                    token_type = word_classes[word] = classify(word, False)
+                append((end - start, token_type))
+            elif kind == 'call':
+                append((end - start, classify(text[start:end], True)))
+            else:
+                append((end - start, 'string'))
 
         return segments
 
-    def _classify_word(self, word: str, line: str, pos: int) -> str:
+    def _classify_word(self, word: str, is_call: bool) -> str:
         """Classify a word for syntax coloring."""
-        keywords = {'def', 'class', 'if', 'else', 'elif', 'for', 'while', 'try', 'except',
-                   'finally', 'with', 'as', 'import', 'from', 'return', 'yield', 'raise',
-                   'break', 'continue', 'pass', 'lambda', 'and', 'or', 'not', 'in', 'is',
-                   'True', 'False', 'None', 'self', 'function', 'const', 'let', 'var',
-                   'async', 'await', 'export', 'default', 'new', 'this'}
-
-        if word in keywords:
+        if word in self.KEYWORDS:
             return 'keyword'
 
-        # Check if followed by ( -> function
-        after_word = line[pos + len(word):].lstrip()
-        if after_word.startswith('('):
+        # Followed by ( -> function
+        if is_call:
             return 'function'
 
         # Check for class names (PascalCase)
-        if word and word[0].isupper() and not word.isupper():
+        if word[0].isupper() and not word.isupper():
             return 'class'
 
-        # Numbers
-        if word.isdigit() or word.replace('.', '').replace('e', '').replace('-', '').isdigit():
+        # Numbers (words never contain '.' or '-', so only the exponent needs stripping)
+        if word.isdigit() or word.replace('e', '').isdigit():
             return 'number'
 
         return 'default'
@@ -6472,150 +7247,196 @@ class Minimap(QWidget):
         self._update_viewport()
 
 
-class LinterWorker(QThread):
-    """Background worker for running linters on Python files."""
+ThemeManager.on_change(lambda t: Minimap._on_theme_changed())
 
-    diagnostics_ready = Signal(dict)  # line -> 'error'|'warning'|'info'
+
+# Optional streaming JSON parser for large linter reports
+try:
+    import ijson
+    IJSON_AVAILABLE = True
+except ImportError:
+    IJSON_AVAILABLE = False
+
+
+class LinterWorker(QObject):
+    """Runs a linter on Python files in a shared background thread pool.
+
+    One worker lives as long as its editor; each request carries a token that
+    is echoed back so the owner can drop results a newer request superseded.
+    Linting several open files runs them concurrently on one pool instead of
+    one QThread per file; diagnostics_ready is queued back to the GUI thread.
+    """
+
+    diagnostics_ready = Signal(int, dict)  # token, line -> 'error'|'warning'|'info'
 
     # Linter preference order (pylint = most thorough but slower)
     LINTERS = ['pylint', 'ruff', 'flake8']
+    MAX_WORKERS = 4
+
+    # "row:col:code:text" lines from the flake8 --format used below
+    _FLAKE8_RE = re.compile(r'^\s*(\d+):\d+:([^:\n]*)', re.MULTILINE)
+
+    _lint_pool: Optional[ThreadPoolExecutor] = None
+    _detected_linter: Optional[str] = None
+    _linter_detected = False
 
-    def __init__(self, file_path: str, content: str = None, parent=None):
+    def __init__(self, parent=None):
         super().__init__(parent)
-        self._file_path = file_path
-        self._content = content  # Optional: lint from content instead of file
-        self._linter = None
-
-    def _detect_linter(self) -> Optional[str]:
-        """Detect available linter."""
-        import shutil
-        for linter in self.LINTERS:
-            if shutil.which(linter):
-                return linter
-        return None
+        self._future: Optional[Future] = None  # Latest queued lint
 
-    def run(self):
+    @classmethod
+    def _pool(cls) -> ThreadPoolExecutor:
+        if cls._lint_pool is None:
+            cls._lint_pool = ThreadPoolExecutor(
+                max_workers=cls.MAX_WORKERS, thread_name_prefix="lint")
+        return cls._lint_pool
+
+    @classmethod
+    def _detect_linter(cls) -> Optional[str]:
+        """Detect available linter (PATH is searched once per session)."""
+        if not cls._linter_detected:
+            cls._detected_linter = next(
+                (linter for linter in cls.LINTERS if shutil.which(linter)), None)
+            cls._linter_detected = True
+        return cls._detected_linter
+
+    def request(self, token: int, file_path: str):
+        """Queue a lint of file_path on the shared pool.
+
+        A superseded request that has not started yet is dropped from the pool.
+        """
+        if self._future is not None:
+            self._future.cancel()
+        self._future = self._pool().submit(self.run, token, file_path)
+
+    def run(self, token: int, file_path: str):
         """Run linter and emit diagnostics."""
-        if not self._file_path.endswith('.py'):
-            self.diagnostics_ready.emit({})
+        if not file_path.endswith('.py'):
+            self.diagnostics_ready.emit(token, {})
             return
 
         linter = self._detect_linter()
         if not linter:
-            self.diagnostics_ready.emit({})
+            self.diagnostics_ready.emit(token, {})
             return
 
-        self._linter = linter
         diagnostics = {}
 
         try:
             if linter == 'ruff':
-                diagnostics = self._run_ruff()
+                diagnostics = self._run_ruff(file_path)
             elif linter == 'flake8':
-                diagnostics = self._run_flake8()
+                diagnostics = self._run_flake8(file_path)
             elif linter == 'pylint':
-                diagnostics = self._run_pylint()
+                diagnostics = self._run_pylint(file_path)
         except Exception:
             pass
 
-        self.diagnostics_ready.emit(diagnostics)
+        # Runners keep (rank, severity) so merging is an int compare
+        self.diagnostics_ready.emit(
+            token, {line: severity for line, (_, severity) in diagnostics.items()})
+
+    def _json_issues(self, cmd: List[str], timeout: float):
+        """Yield the objects of a linter's JSON array output.
+
+        With ijson the array is parsed while the linter is still writing it;
+        otherwise stdout is buffered and decoded in one go.
+        """
+        if not IJSON_AVAILABLE:
+            result = subprocess.run(cmd, capture_output=True, text=True, timeout=timeout)
+            if result.stdout:
+                try:
+                    yield from json.loads(result.stdout)
+                except json.JSONDecodeError:
+                    pass
+            return
 
-    def _run_ruff(self) -> Dict[int, str]:
+        proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+        killer = threading.Timer(timeout, proc.kill)
+        killer.start()
+        try:
+            yield from ijson.items(proc.stdout, 'item')
+        except ijson.JSONError:
+            pass  # No output (linter missing a target) or killed mid-stream
+        finally:
+            killer.cancel()
+            if proc.poll() is None:
+                proc.kill()
+            proc.stdout.close()
+            proc.wait()
+
+    def _run_ruff(self, file_path: str) -> Dict[int, tuple]:
         """Run ruff linter (fastest, Rust-based)."""
-        import subprocess
         diagnostics = {}
 
         try:
-            cmd = ['ruff', 'check', '--output-format', 'json', self._file_path]
-            result = subprocess.run(cmd, capture_output=True, text=True, timeout=10)
-
-            if result.stdout:
-                issues = json.loads(result.stdout)
-                for issue in issues:
-                    line = issue.get('location', {}).get('row', 0)
-                    code = issue.get('code', '')
-                    # E/W prefix = error/warning, others = info
-                    if code.startswith('E') or code.startswith('F'):
-                        severity = 'error'
-                    elif code.startswith('W'):
-                        severity = 'warning'
-                    else:
-                        severity = 'info'
-                    # Keep highest severity per line
-                    if line not in diagnostics or self._severity_rank(severity) > self._severity_rank(diagnostics[line]):
-                        diagnostics[line] = severity
+            cmd = ['ruff', 'check', '--output-format', 'json', file_path]
+            for issue in self._json_issues(cmd, timeout=10):
+                line = issue.get('location', {}).get('row', 0)
+                code = issue.get('code', '')
+                # E/W prefix = error/warning, others = info
+                if code.startswith('E') or code.startswith('F'):
+                    severity, rank = 'error', 3
+                elif code.startswith('W'):
+                    severity, rank = 'warning', 2
+                else:
+                    severity, rank = 'info', 1
+                # Keep highest severity per line
+                if line not in diagnostics or rank > diagnostics[line][0]:
+                    diagnostics[line] = (rank, severity)
         except Exception:
             pass
 
         return diagnostics
 
-    def _run_flake8(self) -> Dict[int, str]:
+    def _run_flake8(self, file_path: str) -> Dict[int, tuple]:
         """Run flake8 linter."""
-        import subprocess
         diagnostics = {}
 
         try:
-            cmd = ['flake8', '--format', '%(row)d:%(col)d:%(code)s:%(text)s', self._file_path]
+            cmd = ['flake8', '--format', '%(row)d:%(col)d:%(code)s:%(text)s', file_path]
             result = subprocess.run(cmd, capture_output=True, text=True, timeout=30)
 
-            for line_text in result.stdout.strip().split('\n'):
-                if ':' in line_text:
-                    parts = line_text.split(':')
-                    if len(parts) >= 3:
-                        try:
-                            line = int(parts[0])
-                            code = parts[2] if len(parts) > 2 else ''
-                            # E = error, W = warning, C/F = convention/fatal
-                            if code.startswith('E') or code.startswith('F'):
-                                severity = 'error'
-                            elif code.startswith('W'):
-                                severity = 'warning'
-                            else:
-                                severity = 'info'
-                            if line not in diagnostics or self._severity_rank(severity) > self._severity_rank(diagnostics[line]):
-                                diagnostics[line] = severity
-                        except ValueError:
-                            pass
+            for match in self._FLAKE8_RE.finditer(result.stdout):
+                line = int(match.group(1))
+                code = match.group(2)
+                # E = error, W = warning, C/F = convention/fatal
+                if code.startswith('E') or code.startswith('F'):
+                    severity, rank = 'error', 3
+                elif code.startswith('W'):
+                    severity, rank = 'warning', 2
+                else:
+                    severity, rank = 'info', 1
+                if line not in diagnostics or rank > diagnostics[line][0]:
+                    diagnostics[line] = (rank, severity)
         except Exception:
             pass
 
         return diagnostics
 
-    def _run_pylint(self) -> Dict[int, str]:
+    def _run_pylint(self, file_path: str) -> Dict[int, tuple]:
         """Run pylint linter."""
-        import subprocess
         diagnostics = {}
 
         try:
-            cmd = ['pylint', '--output-format', 'json', '--score', 'n', self._file_path]
-            result = subprocess.run(cmd, capture_output=True, text=True, timeout=60)
-
-            if result.stdout:
-                try:
-                    issues = json.loads(result.stdout)
-                    for issue in issues:
-                        line = issue.get('line', 0)
-                        msg_type = issue.get('type', '').lower()
-                        # Map pylint types to our severity
-                        if msg_type in ('error', 'fatal'):
-                            severity = 'error'
-                        elif msg_type == 'warning':
-                            severity = 'warning'
-                        else:
-                            severity = 'info'
-                        if line not in diagnostics or self._severity_rank(severity) > self._severity_rank(diagnostics[line]):
-                            diagnostics[line] = severity
-                except json.JSONDecodeError:
-                    pass
+            cmd = ['pylint', '--output-format', 'json', '--score', 'n', file_path]
+            for issue in self._json_issues(cmd, timeout=60):
+                line = issue.get('line', 0)
+                msg_type = issue.get('type', '').lower()
+                # Map pylint types to our severity
+                if msg_type in ('error', 'fatal'):
+                    severity, rank = 'error', 3
+                elif msg_type == 'warning':
+                    severity, rank = 'warning', 2
+                else:
+                    severity, rank = 'info', 1
+                if line not in diagnostics or rank > diagnostics[line][0]:
+                    diagnostics[line] = (rank, severity)
         except Exception:
             pass
 
         return diagnostics
 
-    def _severity_rank(self, severity: str) -> int:
-        """Get numeric rank for severity (higher = more severe)."""
-        return {'info': 1, 'warning': 2, 'error': 3}.get(severity, 0)
-
 
 class EditorWithFindReplace(QWidget):
     """Wrapper widget that combines code editor with find/replace functionality."""
@@ -6623,12 +7444,38 @@ class EditorWithFindReplace(QWidget):
     cursor_position_changed = Signal(int, int)  # line, column
     modification_changed = Signal(bool)  # is_modified
 
+    LINT_CACHE_SIZE = 32  # Lint results kept per editor, keyed by content digest
+
+    # Lint debounce (ms): small edits wait for typing to settle, pastes and
+    # other bulk edits lint sooner
+    LINT_DELAY_MS = 1500
+    LINT_DELAY_TYPING_MS = 2500
+    LINT_DELAY_BULK_MS = 500
+    LINT_TYPING_CHARS = 3
+    LINT_BULK_CHARS = 200
+    # Files larger than this on disk are linted on open/save/demand, not while typing
+    LINT_ON_TYPE_MAX_BYTES = 1024 * 1024
+    # Cursor moves are reported at most once per frame (~60 Hz)
+    CURSOR_REPORT_MS = 16
+
     def __init__(self, parent=None):
         super().__init__(parent)
         self.current_file: Optional[Path] = None
         self._is_modified = False
-        self._linter_worker: Optional[LinterWorker] = None
+        self._linter_worker = LinterWorker(self)
+        self._linter_worker.diagnostics_ready.connect(self._on_lint_finished)
+        self._lint_token = 0  # Token of the latest lint request
         self._lint_timer: Optional[QTimer] = None
+        self._lint_text_len = 0  # Document length at the last scheduled lint
+        self._file_size = 0  # On-disk size, refreshed on load and save
+        self._disk_stat = (0, 0)  # (size, mtime_ns) after our last load/save
+        # External edits (formatter, git checkout) invalidate lint results
+        self._fs_watcher = QFileSystemWatcher(self)
+        self._fs_watcher.fileChanged.connect(self._on_file_changed_on_disk)
+        # Diagnostics by content digest, LRU order; see _run_linter
+        self._lint_cache: OrderedDict = OrderedDict()
+        self._lint_digest: Optional[bytes] = None  # Digest the latest lint is for
+        self._lint_pending = False  # Latest lint request still running
 
         layout = QVBoxLayout(self)
         layout.setContentsMargins(0, 0, 0, 0)
@@ -6662,7 +7509,14 @@ class EditorWithFindReplace(QWidget):
         self.find_widget.replace_all.connect(self._on_replace_all)
         self.find_widget.closed.connect(lambda: self.editor.setFocus())
 
-        # Connect cursor position change
+        self.editor.search_finished.connect(self.find_widget.update_match_count)
+
+        # Connect cursor position change; bursts (key repeat, typing) are
+        # coalesced into one report per CURSOR_REPORT_MS
+        self._cursor_timer = QTimer(self)
+        self._cursor_timer.setSingleShot(True)
+        self._cursor_timer.setInterval(self.CURSOR_REPORT_MS)
+        self._cursor_timer.timeout.connect(self._flush_cursor)
         self.editor.cursorPositionChanged.connect(self._on_cursor_changed)
 
         # Connect document modification tracking
@@ -6674,8 +7528,20 @@ class EditorWithFindReplace(QWidget):
         self._lint_timer.timeout.connect(self._run_linter)
         self.editor.textChanged.connect(self._schedule_lint)
 
-        # Install shortcut handler
-        self.editor.installEventFilter(self)
+        # Editor-scoped shortcuts; Qt matches these in C++ instead of routing
+        # every editor event through a Python eventFilter
+        for sequence, handler in (
+            ("Ctrl+F", self.show_find),
+            ("Ctrl+H", self.show_replace),
+            ("F3", lambda: self._on_find_next(self.find_widget.find_input.text(),
+                                              self.find_widget.case_btn.isChecked())),
+            ("Shift+F3", lambda: self._on_find_prev(self.find_widget.find_input.text(),
+                                                    self.find_widget.case_btn.isChecked())),
+            ("Escape", self._close_find),
+        ):
+            shortcut = QShortcut(QKeySequence(sequence), self.editor)
+            shortcut.setContext(Qt.ShortcutContext.WidgetShortcut)
+            shortcut.activated.connect(handler)
 
     def _on_modification_changed(self, modified: bool):
         """Track document modification state."""
@@ -6688,84 +7554,92 @@ class EditorWithFindReplace(QWidget):
         return self._is_modified
 
     def _on_cursor_changed(self):
-        """Emit cursor position when it changes."""
+        """Schedule a cursor position report unless one is already pending."""
+        if not self._cursor_timer.isActive():
+            self._cursor_timer.start()
+
+    def _flush_cursor(self):
+        """Emit the current cursor position."""
         cursor = self.editor.textCursor()
         line = cursor.blockNumber() + 1
         col = cursor.columnNumber() + 1
         self.cursor_position_changed.emit(line, col)
 
     def _schedule_lint(self):
-        """Schedule linting with debounce (wait for user to stop typing)."""
+        """Schedule linting with debounce (wait for user to stop typing).
+
+        The delay follows the size of the edit, measured by how much the
+        document length changed (characterCount() is O(1)).
+        """
+        if self._file_size > self.LINT_ON_TYPE_MAX_BYTES:
+            return
         if self._lint_timer:
-            self._lint_timer.stop()
-            self._lint_timer.start(1500)  # 1.5 second debounce
+            text_len = self.editor.document().characterCount()
+            delta = abs(text_len - self._lint_text_len)
+            self._lint_text_len = text_len
+            if delta > self.LINT_BULK_CHARS:
+                delay = self.LINT_DELAY_BULK_MS
+            elif delta < self.LINT_TYPING_CHARS:
+                delay = self.LINT_DELAY_TYPING_MS
+            else:
+                delay = self.LINT_DELAY_MS
+            self._lint_timer.start(delay)  # Restarts a pending countdown
 
     def _run_linter(self):
         """Run linter on current file."""
         if not self.current_file or not str(self.current_file).endswith('.py'):
             return
 
-        # Cancel any running linter
-        if self._linter_worker and self._linter_worker.isRunning():
-            return  # Don't interrupt running linter
+        # Content linted before (unchanged save, undo back to a linted state)
+        hasher = hashlib.blake2b(digest_size=16)
+        for chunk in self.editor.iter_text():
+            hasher.update(chunk.encode())
+        digest = hasher.digest()
+        cached = self._lint_cache.get(digest)
+        if cached is not None:
+            self._lint_token += 1  # Supersede any lint still in flight
+            self._lint_pending = False
+            self._lint_cache.move_to_end(digest)
+            self._write_file()
+            self._on_diagnostics_ready(cached)
+            return
 
         # Save file first if modified (linter needs saved file)
-        if self._is_modified:
-            self.save_file()
-
-        # Start linter worker
-        self._linter_worker = LinterWorker(str(self.current_file))
-        self._linter_worker.diagnostics_ready.connect(self._on_diagnostics_ready)
-        self._linter_worker.start()
+        self._write_file()
+        if self._lint_pending and digest == self._lint_digest:
+            return  # This content is already being linted
+
+        # Queue the lint; any earlier request still running is superseded
+        self._lint_token += 1
+        self._lint_digest = digest
+        self._lint_pending = True
+        self._linter_worker.request(self._lint_token, str(self.current_file))
+
+    def _on_lint_finished(self, token: int, diagnostics: Dict[int, str]):
+        """Remember a fresh lint result for its content, then apply it."""
+        if token != self._lint_token:
+            return  # Stale: a newer lint was requested since
+        self._lint_pending = False
+        self._lint_cache[self._lint_digest] = diagnostics
+        if len(self._lint_cache) > self.LINT_CACHE_SIZE:
+            self._lint_cache.popitem(last=False)
+        self._on_diagnostics_ready(diagnostics)
 
     def _on_diagnostics_ready(self, diagnostics: Dict[int, str]):
         """Handle linter diagnostics and update minimap."""
         self.minimap.set_diagnostics(diagnostics)
 
-        # Also update line number area if it supports diagnostics
-        if hasattr(self.editor, 'line_number_area'):
-            # Could extend LineNumberArea to show diagnostics too
-            pass
-
     def run_linter_now(self):
         """Manually trigger linting immediately."""
         if self._lint_timer:
             self._lint_timer.stop()
         self._run_linter()
 
-    def eventFilter(self, obj, event):
-        """Handle keyboard shortcuts."""
-        if obj == self.editor and event.type() == event.Type.KeyPress:
-            modifiers = event.modifiers()
-            key = event.key()
-
-            # Ctrl+F - Find
-            if modifiers == Qt.KeyboardModifier.ControlModifier and key == Qt.Key.Key_F:
-                self.show_find()
-                return True
-
-            # Ctrl+H - Replace
-            if modifiers == Qt.KeyboardModifier.ControlModifier and key == Qt.Key.Key_H:
-                self.show_replace()
-                return True
-
-            # F3 - Find Next
-            if key == Qt.Key.Key_F3:
-                if modifiers == Qt.KeyboardModifier.ShiftModifier:
-                    self._on_find_prev(self.find_widget.find_input.text(),
-                                       self.find_widget.case_btn.isChecked())
-                else:
-                    self._on_find_next(self.find_widget.find_input.text(),
-                                       self.find_widget.case_btn.isChecked())
-                return True
-
-            # Escape - Close find widget
-            if key == Qt.Key.Key_Escape and self.find_widget.isVisible():
-                self.find_widget.hide()
-                self.editor.setFocus()
-                return True
-
-        return super().eventFilter(obj, event)
+    def _close_find(self):
+        """Escape in the editor closes the find widget if it is open."""
+        if self.find_widget.isVisible():
+            self.find_widget.hide()
+            self.editor.setFocus()
 
     def show_find(self):
         """Show find widget."""
@@ -6783,10 +7657,16 @@ class EditorWithFindReplace(QWidget):
             self.find_widget.find_input.setText(cursor.selectedText())
 
     def _on_find_next(self, text: str, case_sensitive: bool):
+        if self.editor.needs_async_search(text, case_sensitive):
+            self.editor.find_all_async(text, case_sensitive, forward=True)
+            return
         current, total = self.editor.find_next(text, case_sensitive)
         self.find_widget.update_match_count(current, total)
 
     def _on_find_prev(self, text: str, case_sensitive: bool):
+        if self.editor.needs_async_search(text, case_sensitive):
+            self.editor.find_all_async(text, case_sensitive, forward=False)
+            return
         current, total = self.editor.find_prev(text, case_sensitive)
         self.find_widget.update_match_count(current, total)
 
@@ -6798,8 +7678,7 @@ class EditorWithFindReplace(QWidget):
         count = self.editor.replace_all(find_text, replace_text, case_sensitive)
         self.find_widget.update_match_count(0, 0)
         if count > 0:
-            self.find_widget.match_label.setText(f"{count} replaced")
-            self.find_widget.match_label.setStyleSheet(f"color: {Theme.SUCCESS}; font-size: 10px;")
+            self.find_widget.show_replaced_count(count)
 
     # Proxy methods to underlying editor
     def load_file(self, path: Path):
@@ -6808,16 +7687,63 @@ class EditorWithFindReplace(QWidget):
         # Reset modification state after loading
         self.editor.document().setModified(False)
         self._is_modified = False
-        # Run linter on file open
+        self._disk_stat = self._stat(path)
+        self._file_size = self._disk_stat[0]
+        # Watch only the current file
+        watched = self._fs_watcher.files()
+        if watched:
+            self._fs_watcher.removePaths(watched)
+        self._fs_watcher.addPath(str(path))
+        # Run linter on file open (not again via the debounce the load triggered)
+        self._lint_timer.stop()
+        self._lint_text_len = self.editor.document().characterCount()
         QTimer.singleShot(500, self._run_linter)
 
+    @staticmethod
+    def _stat(path: Optional[Path]) -> tuple:
+        """(size, mtime_ns) of the file on disk, zeros if unavailable."""
+        try:
+            if path:
+                st = path.stat()
+                return st.st_size, st.st_mtime_ns
+        except OSError:
+            pass
+        return 0, 0
+
+    def _on_file_changed_on_disk(self, path: str):
+        """Drop cached lint results and relint after an external change."""
+        # Atomic replaces (git, most formatters) drop the path from the watcher
+        if path not in self._fs_watcher.files() and os.path.exists(path):
+            self._fs_watcher.addPath(path)
+        stat = self._stat(self.current_file)
+        if stat == self._disk_stat:
+            return  # Our own save
+        self._disk_stat = stat
+        self._file_size = stat[0]
+        self._lint_cache.clear()
+        self._lint_digest = None  # A lint still running read the old file
+        # Linting saves unsaved edits first; never overwrite the external change
+        if not self._is_modified:
+            self.run_linter_now()
+
     def save_file(self):
+        # Nothing to write (and nothing new to lint) since the last load/save
+        if not self._write_file():
+            return
+        # Run linter after save
+        QTimer.singleShot(100, self._run_linter)
+
+    def _write_file(self) -> bool:
+        """Write unsaved edits to disk without scheduling a lint; True if written."""
+        if not self._is_modified:
+            return False
         self.editor.save_file()
+        self._disk_stat = self._stat(self.current_file)
+        self._file_size = self._disk_stat[0]
         # Reset modification state after saving
         self.editor.document().setModified(False)
         self._is_modified = False
-        # Run linter after save
-        QTimer.singleShot(100, self._run_linter)
+        return True
 
     def toPlainText(self):
         return self.editor.toPlainText()
@@ -6846,12 +7772,38 @@ class EditorWithFindReplace(QWidget):
 # Editor Tabs
 # ============================================================================
 
-class EditorArea(QWidget):
+class EditorArea(QWidget, ThemedStylesheets):
     """Split editor area supporting horizontal/vertical splits."""
 
     file_opened = Signal(Path)
     cursor_position_changed = Signal(int, int)  # line, col
 
+    # Stylesheets as Theme templates; formatted once per theme by _stylesheet
+    _QSS_TEMPLATES = {
+        'splitter': """
+            QSplitter::handle {{
+                background: {BORDER};
+            }}
+            QSplitter::handle:hover {{
+                background: {ACCENT_BLUE};
+            }}
+        """,
+        'menu': """
+            QMenu {{
+                background: {BG_SECONDARY};
+                color: {TEXT_PRIMARY};
+                border: 1px solid {BORDER};
+                padding: 4px;
+            }}
+            QMenu::item {{
+                padding: 6px 20px;
+            }}
+            QMenu::item:selected {{
+                background: {BG_SELECTED};
+            }}
+        """,
+    }
+
     def __init__(self, parent=None):
         super().__init__(parent)
         self._open_files: Dict[str, int] = {}
@@ -6864,14 +7816,7 @@ class EditorArea(QWidget):
         # Main splitter for editor panes
         self.splitter = QSplitter(Qt.Orientation.Horizontal)
         self.splitter.setHandleWidth(2)
-        self.splitter.setStyleSheet(f"""
-            QSplitter::handle {{
-                background: {Theme.BORDER};
-            }}
-            QSplitter::handle:hover {{
-                background: {Theme.ACCENT_BLUE};
-            }}
-        """)
+        self.splitter.setStyleSheet(self._stylesheet('splitter'))
 
         # Create first editor pane
         self._panes: List[EditorTabs] = []
@@ -6952,20 +7897,7 @@ class EditorArea(QWidget):
     def _show_context_menu(self, pos):
         """Show context menu for split options."""
         menu = QMenu(self)
-        menu.setStyleSheet(f"""
-            QMenu {{
-                background: {Theme.BG_SECONDARY};
-                color: {Theme.TEXT_PRIMARY};
-                border: 1px solid {Theme.BORDER};
-                padding: 4px;
-            }}
-            QMenu::item {{
-                padding: 6px 20px;
-            }}
-            QMenu::item:selected {{
-                background: {Theme.BG_SELECTED};
-            }}
-        """)
+        menu.setStyleSheet(self._stylesheet('menu'))
 
         split_h = menu.addAction("Split Editor Right")
         split_h.triggered.connect(self.split_horizontal)
@@ -7054,36 +7986,57 @@ class EditorArea(QWidget):
             self._active_pane.removeTab(index)
 
 
-class EditorTabs(QTabWidget):
+class _EditorTabBar(QTabBar):
+    """Tab bar that reports middle-clicks and context menu requests on tabs."""
+
+    middle_clicked = Signal(int)  # tab index
+    context_menu_requested = Signal(int, QPoint)  # tab index, global position
+
+    def mousePressEvent(self, event):
+        if event.button() == Qt.MouseButton.MiddleButton:
+            tab_index = self.tabAt(event.position().toPoint())
+            if tab_index >= 0:
+                self.middle_clicked.emit(tab_index)
+                return
+        super().mousePressEvent(event)
+
+    def contextMenuEvent(self, event):
+        tab_index = self.tabAt(event.pos())
+        if tab_index >= 0:
+            self.context_menu_requested.emit(tab_index, event.globalPos())
+        else:
+            super().contextMenuEvent(event)
+
+
+class EditorTabs(QTabWidget, ThemedStylesheets):
     """Tabbed editor container with modification indicators."""
 
     MODIFIED_DOT = "*"  # Asterisk for modified indicator (VS Code style)
+    # Tab widget class by lowercase suffix; everything else opens in the editor
+    VIEWER_CLASSES: Dict[str, type] = dict.fromkeys(('.xlsx', '.xls', '.xlsm'), ExcelViewer)
     cursor_position_changed = Signal(int, int)  # line, col
 
-    def __init__(self, parent=None):
-        super().__init__(parent)
-        self.setTabsClosable(True)
-        self.setMovable(True)
-        self.setDocumentMode(True)
-
-        self.setStyleSheet(f"""
-            QTabWidget::pane {{ border: none; background: {Theme.BG_MAIN}; }}
-            QTabBar {{ background: {Theme.BG_SECONDARY}; }}
+    # Stylesheets as Theme templates; formatted once per theme by _stylesheet
+    _QSS_TEMPLATES = {
+        'tabs': """
+            QTabWidget::pane {{ border: none; background: {BG_MAIN}; }}
+            QTabBar {{ background: {BG_SECONDARY}; }}
             QTabBar::tab {{
-                background: {Theme.BG_SECONDARY};
-                color: {Theme.TEXT_SECONDARY};
+                background: {BG_SECONDARY};
+                color: {TEXT_SECONDARY};
                 padding: 6px 24px 6px 14px;
                 border: none;
                 border-bottom: 1px solid transparent;
                 font-size: 11px;
             }}
             QTabBar::tab:selected {{
-                background: {Theme.BG_MAIN};
-                color: {Theme.TEXT_PRIMARY};
-                border-bottom: 1px solid {Theme.ACCENT_BLUE};
+                background: {BG_MAIN};
+                color: {TEXT_PRIMARY};
+                border-bottom: 1px solid {ACCENT_BLUE};
             }}
-            QTabBar::tab:hover {{ background: {Theme.BG_TERTIARY}; }}
+            QTabBar::tab:hover {{ background: {BG_TERTIARY}; }}
             QTabBar::close-button {{
+                {CLOSE_ICON_RULE}
                 subcontrol-position: right;
                 margin-right: 4px;
                 width: 12px;
@@ -7094,62 +8047,84 @@ class EditorTabs(QTabWidget):
             QTabBar::close-button:hover {{
                 background: rgba(255, 255, 255, 0.1);
             }}
-        """)
-
-        self._open_files: Dict[str, int] = {}
-        self._original_names: Dict[int, str] = {}  # index -> original filename
-        self._close_icon = Icons.close(12, Theme.TEXT_MUTED)
-
-        # Set custom close button icons for each tab
-        self._setup_close_buttons()
-
-        self.tabCloseRequested.connect(self._on_close_requested)
-
-        # Enable middle-click to close tabs
-        self.tabBar().installEventFilter(self)
-
-    def eventFilter(self, obj, event):
-        """Handle middle-click to close tabs and context menu."""
-        if obj == self.tabBar():
-            if event.type() == event.Type.MouseButtonPress:
-                if event.button() == Qt.MouseButton.MiddleButton:
-                    tab_index = self.tabBar().tabAt(event.pos())
-                    if tab_index >= 0:
-                        self._on_close_requested(tab_index)
-                        return True
-            elif event.type() == event.Type.ContextMenu:
-                tab_index = self.tabBar().tabAt(event.pos())
-                if tab_index >= 0:
-                    self._show_tab_context_menu(tab_index, event.globalPos())
-                    return True
-        return super().eventFilter(obj, event)
-
-    def _show_tab_context_menu(self, index: int, pos):
-        """Show context menu for tab."""
-        menu = QMenu(self)
-        menu.setStyleSheet(f"""
+        """,
+        'menu': """
             QMenu {{
-                background: {Theme.BG_SECONDARY};
-                color: {Theme.TEXT_PRIMARY};
-                border: 1px solid {Theme.BORDER};
+                background: {BG_SECONDARY};
+                color: {TEXT_PRIMARY};
+                border: 1px solid {BORDER};
                 padding: 4px;
             }}
             QMenu::item {{
                 padding: 6px 24px 6px 12px;
             }}
             QMenu::item:selected {{
-                background: {Theme.BG_SELECTED};
+                background: {BG_SELECTED};
             }}
             QMenu::separator {{
                 height: 1px;
-                background: {Theme.BORDER};
+                background: {BORDER};
                 margin: 4px 8px;
             }}
-        """)
+        """,
+    }
+
+    @classmethod
+    def _qss_values(cls) -> Dict[str, str]:
+        return dict(ThemeManager.get_theme(), CLOSE_ICON_RULE=cls._close_icon_rule())
+
+    @staticmethod
+    def _close_icon_rule() -> str:
+        """`image:` declaration for the QTabBar::close-button rule.
+
+        Style sheets only load images from files or resources, so the glyph is
+        written once per colour to the config cache dir. If that fails the
+        rule is left out and Qt draws its native close button.
+        """
+        color = Theme.TEXT_MUTED
+        path = CONFIG_DIR / "cache" / f"tab-close-{color.lstrip('#')}.svg"
+        if not path.exists():
+            svg = ('<svg width="12" height="12" viewBox="0 0 16 16" fill="none" '
+                   'xmlns="http://www.w3.org/2000/svg">'
+                   f'{Icons.SVG_CLOSE.format(color=color)}</svg>')
+            try:
+                path.parent.mkdir(parents=True, exist_ok=True)
+                path.write_text(svg, encoding='utf-8')
+            except OSError as e:
+                logger.debug(f"Could not write tab close icon: {e}")
+                return ""
+        return f'image: url("{path.as_posix()}");'
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        # Middle-click closes a tab; right-click opens the tab context menu
+        tab_bar = _EditorTabBar()
+        tab_bar.middle_clicked.connect(self._on_close_requested)
+        tab_bar.context_menu_requested.connect(self._show_tab_context_menu)
+        self.setTabBar(tab_bar)
+
+        self.setTabsClosable(True)
+        self.setMovable(True)
+        self.setDocumentMode(True)
+
+        self.setStyleSheet(self._stylesheet('tabs'))
+
+        # Tracking is keyed by tab widget, so closing or moving tabs never
+        # requires renumbering
+        self._open_files: Dict[str, QWidget] = {}  # path -> tab widget
+        self._tab_paths: Dict[QWidget, str] = {}  # tab widget -> path
+        self._original_names: Dict[QWidget, str] = {}  # tab widget -> original filename
+
+        self.tabCloseRequested.connect(self._on_close_requested)
+
+    def _show_tab_context_menu(self, index: int, pos):
+        """Show context menu for tab."""
+        menu = QMenu(self)
+        menu.setStyleSheet(self._stylesheet('menu'))
 
         widget = self.widget(index)
         file_path = getattr(widget, 'current_file', None)
-        file_name = self._original_names.get(index, 'File')
+        file_name = self._original_names.get(widget, 'File')
 
         # Close actions
         close_action = menu.addAction("Close")
@@ -7185,19 +8160,28 @@ class EditorTabs(QTabWidget):
 
     def _close_others(self, keep_index: int):
         """Close all tabs except the specified one."""
-        for i in range(self.count() - 1, -1, -1):
-            if i != keep_index:
-                self._on_close_requested(i)
+        self._close_indices(i for i in range(self.count()) if i != keep_index)
 
     def _close_to_right(self, index: int):
         """Close all tabs to the right of the specified one."""
-        for i in range(self.count() - 1, index, -1):
-            self._on_close_requested(i)
+        self._close_indices(range(index + 1, self.count()))
 
     def _close_all(self):
         """Close all tabs."""
-        for i in range(self.count() - 1, -1, -1):
-            self._on_close_requested(i)
+        self._close_indices(range(self.count()))
+
+    def _close_indices(self, indices):
+        """Close several tabs with a single repaint of the tab bar.
+
+        Tabs are closed from the highest index down so the remaining indices
+        stay valid; each still gets its unsaved-changes prompt.
+        """
+        self.setUpdatesEnabled(False)
+        try:
+            for i in sorted(indices, reverse=True):
+                self._on_close_requested(i)
+        finally:
+            self.setUpdatesEnabled(True)
 
     def _copy_path(self, path: Path):
         """Copy file path to clipboard."""
@@ -7206,53 +8190,12 @@ class EditorTabs(QTabWidget):
 
     def _reveal_in_explorer(self, path: Path):
         """Reveal file in system file explorer."""
-        import subprocess
         if sys.platform == "darwin":
             subprocess.run(["open", "-R", str(path)])
         elif sys.platform == "win32":
             subprocess.run(["explorer", "/select,", str(path)])
         else:
-            subprocess.run(["xdg-open", str(path.parent)])
-
-    def _setup_close_buttons(self):
-        """Setup close buttons for existing tabs."""
-        for i in range(self.count()):
-            self._set_tab_close_button(i)
-
-    def addTab(self, widget, label):
-        """Override addTab to set close button on new tabs."""
-        index = super().addTab(widget, label)
-        self._set_tab_close_button(index)
-        return index
-
-    def _set_tab_close_button(self, index: int):
-        """Set the close button for a specific tab."""
-        close_btn = QPushButton()
-        close_btn.setFixedSize(16, 16)
-        close_btn.setIcon(self._close_icon)
-        close_btn.setIconSize(QSize(12, 12))
-        close_btn.setCursor(Qt.CursorShape.PointingHandCursor)
-        close_btn.setStyleSheet(f"""
-            QPushButton {{
-                background: transparent;
-                border: none;
-                border-radius: 3px;
-                padding: 2px;
-            }}
-            QPushButton:hover {{
-                background: rgba(255, 255, 255, 0.1);
-            }}
-        """)
-        close_btn.clicked.connect(self._on_close_button_clicked)
-        self.tabBar().setTabButton(index, QTabBar.ButtonPosition.RightSide, close_btn)
-
-    def _on_close_button_clicked(self):
-        """Handle close button click - find the correct tab index."""
-        btn = self.sender()
-        for i in range(self.count()):
-            if self.tabBar().tabButton(i, QTabBar.ButtonPosition.RightSide) == btn:
-                self.tabCloseRequested.emit(i)
-                break
+            QDesktopServices.openUrl(QUrl.fromLocalFile(str(path.parent)))
 
     def _on_close_requested(self, index: int):
         """Handle tab close with unsaved changes warning."""
@@ -7261,7 +8204,7 @@ class EditorTabs(QTabWidget):
             # Show confirmation dialog
             reply = QMessageBox.question(
                 self, "Unsaved Changes",
-                f"'{self._original_names.get(index, 'File')}' has unsaved changes.\n\nDo you want to save before closing?",
+                f"'{self._original_names.get(widget, 'File')}' has unsaved changes.\n\nDo you want to save before closing?",
                 QMessageBox.StandardButton.Save |
                 QMessageBox.StandardButton.Discard |
                 QMessageBox.StandardButton.Cancel,
@@ -7278,35 +8221,11 @@ class EditorTabs(QTabWidget):
 
     def _close_tab(self, index: int):
         """Actually close the tab and clean up tracking."""
-        # Find and remove from open files dict
-        path_to_remove = None
-        for path, idx in self._open_files.items():
-            if idx == index:
-                path_to_remove = path
-                break
-        if path_to_remove:
-            del self._open_files[path_to_remove]
-
-        # Remove from original names
-        if index in self._original_names:
-            del self._original_names[index]
-
-        # Update indices for tabs after this one
-        new_open_files = {}
-        for path, idx in self._open_files.items():
-            if idx > index:
-                new_open_files[path] = idx - 1
-            else:
-                new_open_files[path] = idx
-        self._open_files = new_open_files
-
-        new_original_names = {}
-        for idx, name in self._original_names.items():
-            if idx > index:
-                new_original_names[idx - 1] = name
-            else:
-                new_original_names[idx] = name
-        self._original_names = new_original_names
+        widget = self.widget(index)
+        path = self._tab_paths.pop(widget, None)
+        if path is not None:
+            self._open_files.pop(path, None)
+        self._original_names.pop(widget, None)
 
         self.removeTab(index)
 
@@ -7316,54 +8235,55 @@ class EditorTabs(QTabWidget):
         if not editor:
             return
 
-        # Find the tab index for this editor
-        for i in range(self.count()):
-            if self.widget(i) == editor:
-                original_name = self._original_names.get(i, "")
-                if modified:
-                    # Add dot indicator
-                    self.setTabText(i, f"{self.MODIFIED_DOT} {original_name}")
-                    # Change tab text color to indicate unsaved
-                    self.tabBar().setTabTextColor(i, QColor(Theme.WARNING))
-                else:
-                    # Remove dot indicator
-                    self.setTabText(i, original_name)
-                    # Reset color
-                    self.tabBar().setTabTextColor(i, QColor(Theme.TEXT_SECONDARY))
-                break
+        # Tabs are movable, so look the index up now rather than binding it
+        i = self.indexOf(editor)
+        if i < 0:
+            return
+
+        original_name = self._original_names.get(editor, "")
+        if modified:
+            # Add dot indicator
+            self.setTabText(i, f"{self.MODIFIED_DOT} {original_name}")
+            # Change tab text color to indicate unsaved
+            self.tabBar().setTabTextColor(i, Theme.qcolor("WARNING"))
+        else:
+            # Remove dot indicator
+            self.setTabText(i, original_name)
+            # Reset color
+            self.tabBar().setTabTextColor(i, Theme.qcolor("TEXT_SECONDARY"))
 
     def open_file(self, path: Path):
         path_str = str(path)
 
-        if path_str in self._open_files:
-            self.setCurrentIndex(self._open_files[path_str])
-            return
+        open_widget = self._open_files.get(path_str)
+        if open_widget is not None:
+            index = self.indexOf(open_widget)
+            if index >= 0:
+                self.setCurrentIndex(index)
+                return
 
-        # Check file extension to determine which viewer to use
-        suffix = path.suffix.lower()
+        # The file extension determines which viewer to use
+        viewer_class = self.VIEWER_CLASSES.get(path.suffix.lower(), EditorWithFindReplace)
+        tab = viewer_class()
+        tab.load_file(path)
+        tab.modification_changed.connect(self._on_modification_changed)
+        index = self.addTab(tab, path.name)
 
-        if suffix in ('.xlsx', '.xls', '.xlsm'):
-            # Use Excel viewer for spreadsheet files
-            viewer = ExcelViewer()
-            viewer.load_file(path)
-            viewer.modification_changed.connect(self._on_modification_changed)
-            index = self.addTab(viewer, path.name)
-        else:
-            # Use EditorWithFindReplace for text files
-            editor = EditorWithFindReplace()
-            editor.load_file(path)
-            editor.modification_changed.connect(self._on_modification_changed)
-            index = self.addTab(editor, path.name)
-
-        self._open_files[path_str] = index
-        self._original_names[index] = path.name
+        self._open_files[path_str] = tab
+        self._tab_paths[tab] = path_str
+        self._original_names[tab] = path.name
         self.setCurrentIndex(index)
 
+    def clear(self):
+        """Remove all tabs and forget their files."""
+        super().clear()
+        self._open_files.clear()
+        self._tab_paths.clear()
+        self._original_names.clear()
+
     def show_welcome(self, welcome_widget):
         """Show welcome screen in editor area."""
         self.clear()
-        self._open_files.clear()
-        self._original_names.clear()
         self.addTab(welcome_widget, "Welcome")
 
     def save_current(self):
@@ -7397,29 +8317,56 @@ class AnsiColorParser:
         90: "#808080", 91: "#f14c4c", 92: "#4ec9b0", 93: "#dcdcaa",
         94: "#569cd6", 95: "#c586c0", 96: "#4fc1ff", 97: "#ffffff",
     }
+    SGR_RE = re.compile(r'\x1b\[([0-9;]*)m')  # Select Graphic Rendition
+
+    # Raw SGR parameter string -> resulting color, None (reset) or _KEEP.
+    # Terminals repeat a handful of these, so parsing is mostly one lookup.
+    _KEEP = object()  # Parameters that don't change the color (bold, ...)
+    _sgr_cache: Dict[str, Any] = {}
+    SGR_CACHE_SIZE = 1024
+
+    @classmethod
+    def _sgr_color(cls, params: str):
+        """Color set by an SGR parameter string, None for reset, or _KEEP."""
+        if ';' not in params:
+            # Single code (the common case): no list to build
+            code_int = int(params) if params else 0
+            return None if code_int == 0 else cls.COLORS.get(code_int, cls._KEEP)
+        color = cls._KEEP
+        for code in (params.split(';') if params else ('0',)):
+            code_int = int(code) if code else 0
+            if code_int == 0:
+                color = None
+            elif code_int in cls.COLORS:
+                color = cls.COLORS[code_int]
+        return color
 
     @classmethod
     def parse(cls, text: str) -> List[tuple]:
         """Parse ANSI text into (text, color) tuples."""
-        import re
+        # Most output carries no escapes at all; str.find is a C-level scan
+        if text.find('\x1b') < 0:
+            return [(text, None)] if text else []
         result = []
         current_color = None
-        pattern = re.compile(r'\x1b\[([0-9;]*)m')
+        cache = cls._sgr_cache
+        keep = cls._KEEP
 
         last_end = 0
-        for match in pattern.finditer(text):
+        for match in cls.SGR_RE.finditer(text):
             # Add text before this escape sequence
             if match.start() > last_end:
                 result.append((text[last_end:match.start()], current_color))
 
             # Parse the escape code
-            codes = match.group(1).split(';') if match.group(1) else ['0']
-            for code in codes:
-                code_int = int(code) if code else 0
-                if code_int == 0:
-                    current_color = None
-                elif code_int in cls.COLORS:
-                    current_color = cls.COLORS[code_int]
+            params = match.group(1)
+            color = cache.get(params, cache)  # cache itself marks a miss
+            if color is cache:
+                if len(cache) >= cls.SGR_CACHE_SIZE:
+                    cache.clear()
+                color = cache[params] = cls._sgr_color(params)
+            if color is not keep:
+                current_color = color
 
             last_end = match.end()
 
@@ -7430,19 +8377,134 @@ class AnsiColorParser:
         return result
 
 
-class TerminalPanel(QWidget):
+class _AnsiParseSignals(QObject):
+    """Signals for _AnsiParseWorker."""
+
+    finished = Signal(int, object)  # generation, [(text, color)] runs
+
+
+class _AnsiParseWorker(QRunnable):
+    """Strips and parses a large chunk of shell output on a QThreadPool thread."""
+
+    def __init__(self, text: str, generation: int):
+        super().__init__()
+        self.signals = _AnsiParseSignals()
+        self._text = text
+        self._generation = generation
+
+    def run(self):
+        self.signals.finished.emit(self._generation, TerminalPanel._parse_runs(self._text))
+
+
+class TerminalPanel(QWidget, ThemedStylesheets):
     """Professional integrated terminal with persistent shell session."""
 
     command_executed = Signal(str, int)  # command, exit_code
     MAX_BUFFER_LINES = 10000  # Prevent memory issues with large output
+    OUTPUT_FLUSH_MS = 16  # Shell output is rendered at most once per frame
+    ASYNC_PARSE_THRESHOLD = 4096  # Larger chunks are parsed on the thread pool
+    DIR_LISTING_CACHE_SIZE = 64
+    MAX_HISTORY = 1000  # Oldest commands are dropped beyond this
+    _HOME = Path.home()
+    # Output char format per ANSI/message color, shared by all panels; the
+    # palette is small, so each QColor is parsed once per process
+    _formats: Dict[Optional[str], QTextCharFormat] = {}
+    # Tab completion listings: dir path -> (mtime_ns, names), LRU order
+    _dir_listings: OrderedDict = OrderedDict()
+
+    # Control sequences that don't render well in the output pane, in one
+    # pass: private modes, cursor movement/clear screen and mode changes,
+    # then window titles. SGR (m) is left for AnsiColorParser.
+    _CONTROL_SEQ_RE = re.compile(
+        r'\x1b\[(?:\?[0-9;]*[a-zA-Z]|[0-9;]*[ABCDJKHhl])|\x1b\]0;[^\x07]*\x07'
+    )
+
+    # Stylesheets as Theme templates; formatted once per theme by _stylesheet
+    _QSS_TEMPLATES = {
+        'header': "background: {BG_SECONDARY}; border-top: 1px solid {BORDER};",
+        'terminal_btn': """
+            QPushButton {{
+                background: {BG_TERTIARY};
+                color: {TEXT_PRIMARY};
+                border: none;
+                padding: 4px 12px;
+                font-size: 11px;
+                border-radius: 4px 4px 0 0;
+            }}
+            QPushButton:checked {{
+                background: {BG_DARK};
+                border-bottom: 2px solid {ACCENT_BLUE};
+            }}
+        """,
+        'cwd_label': "color: {TEXT_MUTED}; font-size: 10px; padding: 0 8px;",
+        'output': """
+            QPlainTextEdit {{
+                background: #1a1a1a;
+                color: #f0f0f0;
+                border: none;
+                padding: 8px;
+                selection-background-color: #3a3a5a;
+            }}
+            QScrollBar:vertical {{
+                background: #1a1a1a;
+                width: 10px;
+            }}
+            QScrollBar::handle:vertical {{
+                background: #3a3a3a;
+                border-radius: 5px;
+                min-height: 30px;
+            }}
+            QScrollBar::handle:vertical:hover {{
+                background: #4a4a4a;
+            }}
+            QScrollBar::add-line:vertical, QScrollBar::sub-line:vertical {{
+                height: 0;
+            }}
+        """,
+        'input_container': "background: #1a1a1a; border-top: 1px solid {BORDER};",
+        'prompt': """
+            color: {ACCENT_GREEN};
+            font-weight: bold;
+            font-family: {MONO_FONT};
+            font-size: 12px;
+        """,
+        'input': """
+            QLineEdit {{
+                background: transparent;
+                border: none;
+                color: #f0f0f0;
+                font-family: {MONO_FONT};
+                font-size: 12px;
+                padding: 2px;
+            }}
+        """,
+    }
+    _MONO_FONT = 'Menlo' if sys.platform == 'darwin' else 'Consolas'
+
+    @classmethod
+    def _qss_values(cls) -> Dict[str, str]:
+        return dict(ThemeManager.get_theme(), MONO_FONT=cls._MONO_FONT)
 
     def __init__(self, working_dir: str = None, parent=None):
         super().__init__(parent)
         self.working_dir = Path(working_dir) if working_dir else Path.home()
-        self.history: List[str] = []
+        self.history: deque = deque(maxlen=self.MAX_HISTORY)
         self.history_index = -1
         self._shell_ready = False
 
+        # Shell output is buffered and rendered in batches; the incremental
+        # decoder keeps multi-byte characters split across reads intact.
+        # The queue holds raw shell bytes (bytearray) and plain messages
+        # ((text, color) tuples) in display order.
+        self._output_queue: deque = deque()
+        self._parse_worker: Optional[_AnsiParseWorker] = None  # In-flight parse
+        self._output_gen = 0  # Bumped on clear so in-flight parses are dropped
+        self._decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+        self._flush_timer = QTimer(self)
+        self._flush_timer.setSingleShot(True)
+        self._flush_timer.setInterval(self.OUTPUT_FLUSH_MS)
+        self._flush_timer.timeout.connect(self._flush_output)
+
         # Persistent shell process
         self.shell = QProcess(self)
         self.shell.setProcessChannelMode(QProcess.ProcessChannelMode.MergedChannels)
@@ -7461,7 +8523,7 @@ class TerminalPanel(QWidget):
         # Terminal header with tabs
         header = QWidget()
         header.setFixedHeight(32)
-        header.setStyleSheet(f"background: {Theme.BG_SECONDARY}; border-top: 1px solid {Theme.BORDER};")
+        header.setStyleSheet(self._stylesheet('header'))
         header_layout = QHBoxLayout(header)
         header_layout.setContentsMargins(8, 0, 8, 0)
         header_layout.setSpacing(4)
@@ -7470,25 +8532,12 @@ class TerminalPanel(QWidget):
         self.terminal_btn = QPushButton("zsh")
         self.terminal_btn.setCheckable(True)
         self.terminal_btn.setChecked(True)
-        self.terminal_btn.setStyleSheet(f"""
-            QPushButton {{
-                background: {Theme.BG_TERTIARY};
-                color: {Theme.TEXT_PRIMARY};
-                border: none;
-                padding: 4px 12px;
-                font-size: 11px;
-                border-radius: 4px 4px 0 0;
-            }}
-            QPushButton:checked {{
-                background: {Theme.BG_DARK};
-                border-bottom: 2px solid {Theme.ACCENT_BLUE};
-            }}
-        """)
+        self.terminal_btn.setStyleSheet(self._stylesheet('terminal_btn'))
         header_layout.addWidget(self.terminal_btn)
 
         # Working directory label
         self.cwd_label = QLabel(str(self.working_dir.name or "/"))
-        self.cwd_label.setStyleSheet(f"color: {Theme.TEXT_MUTED}; font-size: 10px; padding: 0 8px;")
+        self.cwd_label.setStyleSheet(self._stylesheet('cwd_label'))
         header_layout.addWidget(self.cwd_label)
 
         header_layout.addStretch()
@@ -7514,31 +8563,10 @@ class TerminalPanel(QWidget):
         # Terminal output area - larger font, better styling
         self.output = QPlainTextEdit()
         self.output.setReadOnly(True)
+        # Qt drops the oldest blocks itself once the limit is reached
+        self.output.setMaximumBlockCount(self.MAX_BUFFER_LINES)
         self.output.setFont(QFont("Menlo", 12) if sys.platform == "darwin" else QFont("Consolas", 11))
-        self.output.setStyleSheet(f"""
-            QPlainTextEdit {{
-                background: #1a1a1a;
-                color: #f0f0f0;
-                border: none;
-                padding: 8px;
-                selection-background-color: #3a3a5a;
-            }}
-            QScrollBar:vertical {{
-                background: #1a1a1a;
-                width: 10px;
-            }}
-            QScrollBar::handle:vertical {{
-                background: #3a3a3a;
-                border-radius: 5px;
-                min-height: 30px;
-            }}
-            QScrollBar::handle:vertical:hover {{
-                background: #4a4a4a;
-            }}
-            QScrollBar::add-line:vertical, QScrollBar::sub-line:vertical {{
-                height: 0;
-            }}
-        """)
+        self.output.setStyleSheet(self._stylesheet('output'))
         # Allow clicking in output to focus input
         self.output.mousePressEvent = lambda e: self.input.setFocus()
         layout.addWidget(self.output)
@@ -7546,32 +8574,18 @@ class TerminalPanel(QWidget):
         # Input line with better styling
         input_container = QWidget()
         input_container.setFixedHeight(36)
-        input_container.setStyleSheet(f"background: #1a1a1a; border-top: 1px solid {Theme.BORDER};")
+        input_container.setStyleSheet(self._stylesheet('input_container'))
         input_layout = QHBoxLayout(input_container)
         input_layout.setContentsMargins(8, 4, 8, 4)
         input_layout.setSpacing(8)
 
         # Prompt shows current directory
         self.prompt = QLabel("$")
-        self.prompt.setStyleSheet(f"""
-            color: {Theme.ACCENT_GREEN};
-            font-weight: bold;
-            font-family: {'Menlo' if sys.platform == 'darwin' else 'Consolas'};
-            font-size: 12px;
-        """)
+        self.prompt.setStyleSheet(self._stylesheet('prompt'))
         input_layout.addWidget(self.prompt)
 
         self.input = QLineEdit()
-        self.input.setStyleSheet(f"""
-            QLineEdit {{
-                background: transparent;
-                border: none;
-                color: #f0f0f0;
-                font-family: {'Menlo' if sys.platform == 'darwin' else 'Consolas'};
-                font-size: 12px;
-                padding: 2px;
-            }}
-        """)
+        self.input.setStyleSheet(self._stylesheet('input'))
         self.input.setPlaceholderText("Enter command...")
         self.input.returnPressed.connect(self._send_command)
         self.input.installEventFilter(self)
@@ -7591,6 +8605,7 @@ class TerminalPanel(QWidget):
         self.shell.setEnvironment(env)
 
         self.shell.setWorkingDirectory(str(self.working_dir))
+        self._decoder.reset()  # Drop any partial character from a previous shell
 
         # Show welcome banner first (before shell output)
         self._show_welcome_banner()
@@ -7620,23 +8635,23 @@ class TerminalPanel(QWidget):
 
     def eventFilter(self, obj, event):
         """Handle key events for history navigation and Ctrl+C."""
-        if obj == self.input and event.type() == event.Type.KeyPress:
+        if event.type() == _KEY_PRESS and obj is self.input:
             key = event.key()
             modifiers = event.modifiers()
 
-            if key == Qt.Key.Key_Up:
+            if key == _KEY_UP:
                 self._history_prev()
                 return True
-            elif key == Qt.Key.Key_Down:
+            elif key == _KEY_DOWN:
                 self._history_next()
                 return True
-            elif key == Qt.Key.Key_C and modifiers == Qt.KeyboardModifier.ControlModifier:
+            elif key == _KEY_C and modifiers == _CTRL:
                 self._kill_process()
                 return True
-            elif key == Qt.Key.Key_L and modifiers == Qt.KeyboardModifier.ControlModifier:
+            elif key == _KEY_L and modifiers == _CTRL:
                 self._clear_terminal()
                 return True
-            elif key == Qt.Key.Key_Tab:
+            elif key == _KEY_TAB:
                 # Basic tab completion - could be enhanced
                 self._tab_complete()
                 return True
@@ -7672,8 +8687,8 @@ class TerminalPanel(QWidget):
             search_prefix = Path(prefix).name if '/' in prefix else prefix
 
             if search_dir.exists():
-                matches = [p.name for p in search_dir.iterdir()
-                          if p.name.startswith(search_prefix)]
+                matches = [name for name in self._list_dir(search_dir)
+                           if name.startswith(search_prefix)]
 
                 if len(matches) == 1:
                     # Complete with the single match
@@ -7689,6 +8704,22 @@ class TerminalPanel(QWidget):
         except Exception:
             pass
 
+    @classmethod
+    def _list_dir(cls, directory: Path) -> tuple:
+        """Entry names of a directory, reused until its mtime changes."""
+        key = str(directory)
+        mtime_ns = directory.stat().st_mtime_ns
+        cached = cls._dir_listings.get(key)
+        if cached is not None and cached[0] == mtime_ns:
+            cls._dir_listings.move_to_end(key)
+            return cached[1]
+        names = tuple(p.name for p in directory.iterdir())
+        cls._dir_listings[key] = (mtime_ns, names)
+        cls._dir_listings.move_to_end(key)
+        if len(cls._dir_listings) > cls.DIR_LISTING_CACHE_SIZE:
+            cls._dir_listings.popitem(last=False)
+        return names
+
     def _history_prev(self):
         """Navigate to previous command in history."""
         if self.history and self.history_index > 0:
@@ -7698,11 +8729,12 @@ class TerminalPanel(QWidget):
 
     def _history_next(self):
         """Navigate to next command in history."""
-        if self.history_index < len(self.history) - 1:
+        count = len(self.history)
+        if self.history_index < count - 1:
             self.history_index += 1
             self.input.setText(self.history[self.history_index])
         else:
-            self.history_index = len(self.history)
+            self.history_index = count
             self.input.clear()
 
     def _send_command(self):
@@ -7737,13 +8769,16 @@ class TerminalPanel(QWidget):
         """Update working directory after cd command."""
         try:
             if path == "~" or path == "":
-                new_path = Path.home()
+                new_path = self._HOME
             elif path.startswith("~"):
-                new_path = Path.home() / path[2:]
+                new_path = self._HOME / path[2:]
             elif path.startswith("/"):
                 new_path = Path(path)
             else:
-                new_path = (self.working_dir / path).resolve()
+                new_path = self.working_dir / path
+            if '..' in path:
+                # Lexical, like the shell's logical cd; no stat per component
+                new_path = Path(os.path.normpath(new_path))
 
             if new_path.is_dir():
                 self.working_dir = new_path
@@ -7753,58 +8788,87 @@ class TerminalPanel(QWidget):
             pass
 
     def _on_output(self):
-        """Handle output from shell."""
-        data = self.shell.readAllStandardOutput()
-        text = bytes(data).decode('utf-8', errors='replace')
+        """Buffer output from shell until the next flush."""
+        data = self.shell.readAllStandardOutput().data()
+        queue = self._output_queue
+        if queue and isinstance(queue[-1], bytearray):
+            queue[-1] += data
+        else:
+            queue.append(bytearray(data))
+        if not self._flush_timer.isActive():
+            self._flush_timer.start()
 
-        if text:
-            # Parse ANSI colors and append
-            self._append_ansi_text(text)
+    def _flush_output(self):
+        """Render queued output in order.
 
-    def _append_ansi_text(self, text: str):
-        """Append text with ANSI color support."""
+        Large chunks are parsed on the thread pool; the queue waits for that
+        parse to be inserted so output is never reordered.
+        """
+        self._flush_timer.stop()
+        queue = self._output_queue
+        while queue and self._parse_worker is None:
+            item = queue.popleft()
+            if isinstance(item, tuple):
+                self._insert_runs((item,))
+                continue
+            text = self._decoder.decode(item)  # Accepts the bytearray as is
+            if len(text) < self.ASYNC_PARSE_THRESHOLD:
+                self._insert_runs(self._parse_runs(text))
+            else:
+                self._parse_worker = _AnsiParseWorker(text, self._output_gen)
+                self._parse_worker.signals.finished.connect(self._on_output_parsed)
+                QThreadPool.globalInstance().start(self._parse_worker)
+
+    def _on_output_parsed(self, generation: int, runs: List[tuple]):
+        """Insert runs from _AnsiParseWorker, then continue with the queue."""
+        if generation != self._output_gen:
+            return  # Terminal was cleared meanwhile
+        self._parse_worker = None
+        self._insert_runs(runs)
+        self._flush_output()
+
+    @classmethod
+    def _parse_runs(cls, text: str) -> List[tuple]:
+        """ANSI text -> [(text, color)], adjacent segments of one color merged.
+
+        Pure Python with no Qt calls, so it is safe on a worker thread.
+        """
         # Strip some control sequences that don't render well
-        import re
-        # Remove cursor movement, clear screen, etc.
-        text = re.sub(r'\x1b\[\?[0-9;]*[a-zA-Z]', '', text)
-        text = re.sub(r'\x1b\[[0-9;]*[ABCDJKH]', '', text)
-        text = re.sub(r'\x1b\]0;[^\x07]*\x07', '', text)  # Window title
-        text = re.sub(r'\x1b\[[\?]?[0-9;]*[hlm]', '', text)  # Mode changes
+        text = cls._CONTROL_SEQ_RE.sub('', text)
 
-        # Parse remaining ANSI colors
-        segments = AnsiColorParser.parse(text)
+        runs = []
+        for segment_text, color in AnsiColorParser.parse(text):
+            if not segment_text:
+                continue
+            if runs and runs[-1][1] == color:
+                runs[-1][0].append(segment_text)
+            else:
+                runs.append(([segment_text], color))
+        return [(''.join(parts), color) for parts, color in runs]
 
+    def _insert_runs(self, runs):
+        """Append (text, color) runs at the end of the output."""
+        if not runs:
+            return
         cursor = self.output.textCursor()
         cursor.movePosition(QTextCursor.MoveOperation.End)
 
-        for segment_text, color in segments:
-            if segment_text:
-                fmt = QTextCharFormat()
-                if color:
-                    fmt.setForeground(QColor(color))
-                else:
-                    fmt.setForeground(QColor("#f0f0f0"))
-                cursor.insertText(segment_text, fmt)
+        # One edit block: the document is laid out once for the whole chunk
+        cursor.beginEditBlock()
+        for text, color in runs:
+            cursor.insertText(text, self._output_format(color))
+        cursor.endEditBlock()
 
         self.output.setTextCursor(cursor)
         self.output.ensureCursorVisible()
 
-        # Limit buffer size to prevent memory issues
-        self._prune_buffer()
-
-    def _prune_buffer(self):
-        """Remove oldest lines if buffer exceeds maximum."""
-        doc = self.output.document()
-        line_count = doc.blockCount()
-        if line_count > self.MAX_BUFFER_LINES:
-            # Remove oldest lines
-            cursor = self.output.textCursor()
-            cursor.movePosition(QTextCursor.MoveOperation.Start)
-            lines_to_remove = line_count - self.MAX_BUFFER_LINES
-            for _ in range(lines_to_remove):
-                cursor.movePosition(QTextCursor.MoveOperation.Down, QTextCursor.MoveMode.KeepAnchor)
-            cursor.removeSelectedText()
-            cursor.deleteChar()  # Remove trailing newline
+    def _output_format(self, color: Optional[str]) -> QTextCharFormat:
+        """Char format for an ANSI color (None is the default foreground)."""
+        fmt = TerminalPanel._formats.get(color)
+        if fmt is None:
+            fmt = TerminalPanel._formats[color] = QTextCharFormat()
+            fmt.setForeground(QColor(color or "#f0f0f0"))
+        return fmt
 
     def _on_shell_finished(self, exit_code: int, exit_status):
         """Handle shell process exit."""
@@ -7828,20 +8892,22 @@ class TerminalPanel(QWidget):
 
     def _append_output(self, text: str, color: str):
         """Append plain text to output with specified color."""
-        cursor = self.output.textCursor()
-        cursor.movePosition(QTextCursor.MoveOperation.End)
-
-        fmt = QTextCharFormat()
-        fmt.setForeground(QColor(color))
-        cursor.insertText(text, fmt)
-
-        self.output.setTextCursor(cursor)
-        self.output.ensureCursorVisible()
+        if self._output_queue or self._parse_worker is not None:
+            # Keep it behind shell output that hasn't been rendered yet
+            self._output_queue.append((text, color))
+            if not self._flush_timer.isActive():
+                self._flush_timer.start()
+            return
+        self._insert_runs(((text, color),))
 
     def _clear_terminal(self):
         """Clear terminal output and show welcome banner."""
+        self._output_gen += 1
+        self._parse_worker = None
         self.output.clear()
         self._show_welcome_banner()
+        if self._output_queue:
+            self._flush_timer.start()  # Resume output held behind a dropped parse
 
     def _show_welcome_banner(self):
         """Display a nice welcome banner."""
@@ -7909,12 +8975,68 @@ class TokenTracker(QFrame):
         self.cost_label.setText(f"${cost:.4f}")
 
 
+class _StreamingTextView(QTextEdit):
+    """Read-only plain text view that sizes itself to its content.
+
+    setText appends only the new suffix when the text grew, so each streamed
+    chunk is laid out once; QLabel.setText re-wraps the whole message.
+    """
+
+    def __init__(self, text: str = "", parent=None):
+        super().__init__(parent)
+        self._text = ""
+        self.setReadOnly(True)
+        self.setFrameShape(QFrame.Shape.NoFrame)
+        self.setVerticalScrollBarPolicy(Qt.ScrollBarPolicy.ScrollBarAlwaysOff)
+        self.setHorizontalScrollBarPolicy(Qt.ScrollBarPolicy.ScrollBarAlwaysOff)
+        self.setSizePolicy(QSizePolicy.Policy.Expanding, QSizePolicy.Policy.Fixed)
+        self.document().setDocumentMargin(0)
+        self.document().documentLayout().documentSizeChanged.connect(self._fit_height)
+        self.setText(text)
+
+    def setText(self, text: str):
+        if self._text and text.startswith(self._text):
+            cursor = QTextCursor(self.document())
+            cursor.movePosition(QTextCursor.MoveOperation.End)
+            cursor.insertText(text[len(self._text):])
+        else:
+            self.setPlainText(text)
+        self._text = text
+
+    def text(self) -> str:
+        return self._text
+
+    def _fit_height(self, size):
+        """Grow or shrink with the document instead of scrolling."""
+        self.setFixedHeight(int(size.height() + 0.999))
+
+
 class OutputEntry(QFrame):
     """Claude Code-style output entry - clean, terminal-like with provider-specific colors."""
 
     # Class variable to track current provider
     _current_provider = "circuit"  # Default to circuit
 
+    FRAME_QSS = """
+            QFrame {
+                background: transparent;
+                margin: 0;
+                padding: 0;
+            }
+        """
+    LABEL_QSS = """
+            QLabel, QTextEdit {{
+                color: {color};
+                background: transparent;
+                border: none;
+                font-size: 12px;
+                line-height: 1.5;
+                padding-right: 8px;
+            }}
+        """
+    # Per provider color, shared by all entries; cleared on theme change
+    _label_qss: Dict[str, str] = {}
+
     @classmethod
     def set_provider(cls, provider: str):
         """Set the current provider for message coloring."""
@@ -7938,13 +9060,7 @@ class OutputEntry(QFrame):
         else:
             provider_color = Theme.CIRCUIT_COLOR
 
-        self.setStyleSheet(f"""
-            QFrame {{
-                background: transparent;
-                margin: 0;
-                padding: 0;
-            }}
-        """)
+        self.setStyleSheet(self.FRAME_QSS)
 
         main_layout = QHBoxLayout(self)
         main_layout.setContentsMargins(16, 6, 24, 6)  # More right margin
@@ -7953,30 +9069,28 @@ class OutputEntry(QFrame):
 
         # Marker - use provider color for both user and assistant
         marker = QLabel()
-        if is_user:
-            marker.setPixmap(Icons.send(12, provider_color).pixmap(12, 12))
-        else:
-            marker.setPixmap(Icons.robot(12, provider_color).pixmap(12, 12))
+        marker.setPixmap(Icons.pixmap("send" if is_user else "robot", 12, provider_color))
         marker.setFixedSize(16, 16)
         marker.setAlignment(Qt.AlignmentFlag.AlignTop | Qt.AlignmentFlag.AlignHCenter)
         main_layout.addWidget(marker)
 
-        # Content - use provider color
-        self.content_label = QLabel(content)
-        self.content_label.setWordWrap(True)
+        # Content - use provider color. Assistant replies grow while streaming,
+        # so they use an append-only text view instead of a QLabel
+        if is_user:
+            self.content_label = QLabel(content)
+            self.content_label.setTextFormat(Qt.TextFormat.PlainText)
+            self.content_label.setWordWrap(True)
+            self.content_label.setAlignment(Qt.AlignmentFlag.AlignTop)
+        else:
+            self.content_label = _StreamingTextView(content)
         self.content_label.setTextInteractionFlags(
             Qt.TextInteractionFlag.TextSelectableByMouse |
             Qt.TextInteractionFlag.LinksAccessibleByMouse
         )
-        self.content_label.setStyleSheet(f"""
-            QLabel {{
-                color: {provider_color};
-                font-size: 12px;
-                line-height: 1.5;
-                padding-right: 8px;
-            }}
-        """)
-        self.content_label.setAlignment(Qt.AlignmentFlag.AlignTop)
+        qss = self._label_qss.get(provider_color)
+        if qss is None:
+            qss = self._label_qss[provider_color] = self.LABEL_QSS.format(color=provider_color)
+        self.content_label.setStyleSheet(qss)
         self.content_label.setMinimumWidth(100)
         main_layout.addWidget(self.content_label, 1)
 
@@ -7988,53 +9102,120 @@ class OutputEntry(QFrame):
 ChatMessage = OutputEntry
 
 
-class AnimatedSpinner(QLabel):
-    """Animated spinner for loading states."""
+class AnimatedSpinner(QWidget):
+    """Animated spinner for loading states.
+
+    All running spinners advance together on one shared class-level timer.
+    Frames are pre-shaped QStaticText, so a tick is only a repaint.
+    """
 
     FRAMES = ["|", "/", "-", "\\"]  # ASCII spinner frames
+    FRAME_MS = 150
+
+    _running: set = set()  # Spinners between start() and stop()
+    _timer: Optional[QTimer] = None
+    _frame = 0
+    _font: Optional[QFont] = None
+    _static_frames: List[QStaticText] = []
 
     def __init__(self, parent=None):
         super().__init__(parent)
-        self._frame = 0
-        self._timer = QTimer(self)
-        self._timer.timeout.connect(self._update_frame)
-        self.setStyleSheet(f"color: {Theme.WARNING}; font-size: 12px; font-family: monospace;")
-        self.setText(self.FRAMES[0])
+        cls = AnimatedSpinner
+        if cls._font is None:
+            cls._font = QFont("monospace")
+            cls._font.setStyleHint(QFont.StyleHint.Monospace)
+            cls._font.setPixelSize(12)
+            # Shaped on first draw, then reused by every spinner
+            cls._static_frames = [QStaticText(frame) for frame in cls.FRAMES]
+        self.setFont(cls._font)
+        metrics = self.fontMetrics()
+        self.setFixedSize(max(metrics.horizontalAdvance(f) for f in self.FRAMES), metrics.height())
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        painter.setFont(self._font)
+        painter.setPen(Theme.qcolor("WARNING"))
+        painter.drawStaticText(0, 0, self._static_frames[AnimatedSpinner._frame])
+        painter.end()
 
     def start(self):
         """Start the animation."""
-        self._timer.start(150)
+        cls = AnimatedSpinner
+        cls._running.add(self)
+        self.update()
+        if cls._timer is None:
+            cls._timer = QTimer()
+            cls._timer.setInterval(self.FRAME_MS)
+            cls._timer.timeout.connect(cls._update_frame)
+        if not cls._timer.isActive():
+            cls._timer.start()
 
     def stop(self):
         """Stop the animation."""
-        self._timer.stop()
+        cls = AnimatedSpinner
+        cls._running.discard(self)
+        if not cls._running and cls._timer is not None:
+            cls._timer.stop()
 
-    def _update_frame(self):
-        """Update to next frame."""
-        self._frame = (self._frame + 1) % len(self.FRAMES)
-        self.setText(self.FRAMES[self._frame])
+    @classmethod
+    def _update_frame(cls):
+        """Advance every running spinner to the next frame."""
+        cls._frame = (cls._frame + 1) % len(cls.FRAMES)
+        for spinner in list(cls._running):
+            try:
+                spinner.update()
+            except RuntimeError:  # Deleted while running (e.g. chat cleared)
+                cls._running.discard(spinner)
+        if not cls._running:
+            cls._timer.stop()
 
 
-class ToolInvocation(QFrame):
+class ToolInvocation(QFrame, ThemedStylesheets):
     """Claude Code-style tool invocation display.
 
     Shows tool calls with expandable results section.
     """
 
+    # Stylesheets as Theme templates; formatted once per theme by _stylesheet
+    _QSS_TEMPLATES = {
+        'call': """
+            QLabel {{
+                color: {ACCENT_CYAN};
+                font-size: 12px;
+                font-family: 'Consolas', 'Monaco', monospace;
+                padding-right: 8px;
+            }}
+        """,
+        'result_container': """
+            QFrame {{
+                background: {BG_TERTIARY};
+                border-radius: 4px;
+                margin-left: 26px;
+                margin-top: 4px;
+                margin-right: 8px;
+            }}
+        """,
+        'result': """
+            QLabel {{
+                color: {TEXT_SECONDARY};
+                font-size: 11px;
+                font-family: 'Consolas', 'Monaco', monospace;
+            }}
+        """,
+    }
+
     def __init__(self, name: str, params: dict = None, status: str = "running", parent=None):
         super().__init__(parent)
         self.status = status
         self._expanded = False
         self._result_text = ""
         self.params = params or {}
+        self._name = name
+        self._call_text: Optional[str] = None  # _format_call result, built on first show
+        self._call_suffix = ""  # Lines-changed summary from set_result
+        self._shown_result: Optional[str] = None  # Text in result_label, set on expand
 
-        self.setStyleSheet(f"""
-            QFrame {{
-                background: transparent;
-                margin: 0;
-                padding: 0;
-            }}
-        """)
+        self.setStyleSheet(OutputEntry.FRAME_QSS)
 
         main_layout = QVBoxLayout(self)
         main_layout.setContentsMargins(16, 4, 24, 4)  # Match OutputEntry margins
@@ -8060,18 +9241,12 @@ class ToolInvocation(QFrame):
 
         call_row.addWidget(self.status_widget)
 
-        # Tool name and parameters - function call style
-        call_text = self._format_call(name, self.params)
-        self.call_label = QLabel(call_text)
+        # Tool name and parameters - function call style; the parameters are
+        # formatted on first show (see showEvent)
+        self.call_label = QLabel(f"{name}(...)" if self.params else f"{name}()")
+        self.call_label.setTextFormat(Qt.TextFormat.PlainText)
         self.call_label.setWordWrap(True)
-        self.call_label.setStyleSheet(f"""
-            QLabel {{
-                color: {Theme.ACCENT_CYAN};
-                font-size: 12px;
-                font-family: 'Consolas', 'Monaco', monospace;
-                padding-right: 8px;
-            }}
-        """)
+        self.call_label.setStyleSheet(self._stylesheet('call'))
         self.call_label.setMinimumWidth(100)
         call_row.addWidget(self.call_label, 1)
 
@@ -8079,28 +9254,15 @@ class ToolInvocation(QFrame):
 
         # Expandable results section (initially hidden)
         self.result_container = QFrame()
-        self.result_container.setStyleSheet(f"""
-            QFrame {{
-                background: {Theme.BG_TERTIARY};
-                border-radius: 4px;
-                margin-left: 26px;
-                margin-top: 4px;
-                margin-right: 8px;
-            }}
-        """)
+        self.result_container.setStyleSheet(self._stylesheet('result_container'))
         result_layout = QVBoxLayout(self.result_container)
         result_layout.setContentsMargins(8, 6, 8, 6)
 
         self.result_label = QLabel("")
+        self.result_label.setTextFormat(Qt.TextFormat.PlainText)
         self.result_label.setWordWrap(True)
         self.result_label.setTextInteractionFlags(Qt.TextInteractionFlag.TextSelectableByMouse)
-        self.result_label.setStyleSheet(f"""
-            QLabel {{
-                color: {Theme.TEXT_SECONDARY};
-                font-size: 11px;
-                font-family: 'Consolas', 'Monaco', monospace;
-            }}
-        """)
+        self.result_label.setStyleSheet(self._stylesheet('result'))
         result_layout.addWidget(self.result_label)
 
         self.result_container.hide()
@@ -8115,31 +9277,36 @@ class ToolInvocation(QFrame):
         if not params:
             return f"{name}()"
 
-        # Format parameters
-        param_strs = []
-        for key, value in params.items():
-            if isinstance(value, str):
-                # Truncate long strings
-                display_val = value if len(value) < 50 else value[:47] + "..."
-                param_strs.append(f'{key}: "{display_val}"')
-            else:
-                param_strs.append(f"{key}: {value}")
+        # Format parameters, truncating long strings
+        return f"{name}({', '.join(self._format_param(key, value) for key, value in params.items())})"
+
+    @staticmethod
+    def _format_param(key: str, value) -> str:
+        if isinstance(value, str):
+            display_val = value if len(value) < 50 else value[:47] + "..."
+            return f'{key}: "{display_val}"'
+        return f"{key}: {value}"
 
-        return f"{name}({', '.join(param_strs)})"
+    def showEvent(self, event):
+        """Format the call text the first time the invocation is shown."""
+        if self._call_text is None:
+            self._call_text = self._format_call(self._name, self.params)
+            self.call_label.setText(self._call_text + self._call_suffix)
+        super().showEvent(event)
 
     def _create_status_icon(self, status: str, layout: QHBoxLayout):
         """Create appropriate status icon using VS Code icons."""
         icon_map = {
-            "done": (Icons.check, Theme.SUCCESS),
-            "success": (Icons.check, Theme.SUCCESS),
-            "error": (Icons.error, Theme.ERROR),
-            "pending": (Icons.info, Theme.TEXT_MUTED),
+            "done": ("check", Theme.SUCCESS),
+            "success": ("check", Theme.SUCCESS),
+            "error": ("error", Theme.ERROR),
+            "pending": ("info", Theme.TEXT_MUTED),
         }
 
-        icon_method, color = icon_map.get(status, (Icons.info, Theme.TEXT_MUTED))
+        icon_name, color = icon_map.get(status, ("info", Theme.TEXT_MUTED))
 
         label = QLabel()
-        label.setPixmap(icon_method(12, color).pixmap(12, 12))
+        label.setPixmap(Icons.pixmap(icon_name, 12, color))
         label.setFixedSize(12, 12)
         label.setAlignment(Qt.AlignmentFlag.AlignCenter)
         layout.addWidget(label)
@@ -8148,8 +9315,19 @@ class ToolInvocation(QFrame):
         """Toggle result expansion."""
         if self._result_text:
             self._expanded = not self._expanded
+            if self._expanded:
+                self._show_result()
             self.result_container.setVisible(self._expanded)
 
+    def _show_result(self):
+        """Put the (truncated) result into result_label if it changed."""
+        result = self._result_text
+        # Truncate very long results
+        display = result[:2000] + "..." if len(result) > 2000 else result
+        if display != self._shown_result:
+            self._shown_result = display
+            self.result_label.setText(display)
+
     def set_status(self, status: str):
         """Update the status of the tool call."""
         self.status = status
@@ -8173,27 +9351,45 @@ class ToolInvocation(QFrame):
 
         if lines_changed is not None:
             summary = f"({lines_changed:+d} lines)" if lines_changed != 0 else "(no changes)"
-            self.call_label.setText(f"{self.call_label.text()} {summary}")
+            self._call_suffix = f" {summary}"
+            if self._call_text is not None:
+                self.call_label.setText(self._call_text + self._call_suffix)
 
-        # Truncate very long results
-        display = result[:2000] + "..." if len(result) > 2000 else result
-        self.result_label.setText(display)
+        # A collapsed result is laid out only when expanded (_toggle_expand)
+        if self._expanded:
+            self._show_result()
 
 
 # Keep ToolCallWidget as alias for compatibility
 ToolCallWidget = ToolInvocation
 
+# Output entries cache theme-colored stylesheets
+ThemeManager.on_change(lambda t: OutputEntry._label_qss.clear())
+
 
 class ChatPanel(QWidget):
     """Claude Code-style output panel - terminal-like interface."""
 
     message_sent = Signal(str)
+    # Streamed text is shown at most every STREAM_FLUSH_MS, or every 4x the
+    # last relayout time if that is longer (very long messages)
+    STREAM_FLUSH_MS = 33
+    SCROLL_DELAY_MS = 16  # Lets the layout settle; bursts share one scroll
 
     def __init__(self, parent=None):
         super().__init__(parent)
         self._streaming_message = None
         self._streaming_content = ""
-        self._tool_widgets = {}  # Track tool widgets by ID
+        # Track tool widgets by ID; entries drop once the widget is deleted
+        self._tool_widgets: weakref.WeakValueDictionary = weakref.WeakValueDictionary()
+        self._stream_delay_ms = self.STREAM_FLUSH_MS
+        self._stream_flush_timer = QTimer(self)
+        self._stream_flush_timer.setSingleShot(True)
+        self._stream_flush_timer.timeout.connect(self._flush_stream)
+        self._scroll_timer = QTimer(self)
+        self._scroll_timer.setSingleShot(True)
+        self._scroll_timer.setInterval(self.SCROLL_DELAY_MS)
+        self._scroll_timer.timeout.connect(self._do_scroll_bottom)
 
         layout = QVBoxLayout(self)
         layout.setContentsMargins(0, 0, 0, 0)
@@ -8242,7 +9438,9 @@ class ChatPanel(QWidget):
         self.messages_layout = QVBoxLayout(self.messages_container)
         self.messages_layout.setContentsMargins(0, 8, 12, 8)  # Right margin for scrollbar
         self.messages_layout.setSpacing(12)  # Gap between user query and agent response
-        self.messages_layout.addStretch()
+        # Top alignment instead of a trailing stretch, so entries are appended
+        # with addWidget rather than inserted before the stretch item
+        self.messages_layout.setAlignment(Qt.AlignmentFlag.AlignTop)
 
         self.scroll.setWidget(self.messages_container)
         layout.addWidget(self.scroll)
@@ -8317,8 +9515,8 @@ class ChatPanel(QWidget):
 
     def add_message(self, role: str, content: str):
         msg = ChatMessage(role, content)
-        self.messages_layout.insertWidget(self.messages_layout.count() - 1, msg)
-        QTimer.singleShot(50, self._scroll_bottom)
+        self.messages_layout.addWidget(msg)
+        self._scroll_bottom()
 
         if role == "assistant":
             self._streaming_message = msg
@@ -8326,17 +9524,32 @@ class ChatPanel(QWidget):
 
     def start_assistant_message(self):
         self._streaming_content = ""
+        self._stream_delay_ms = self.STREAM_FLUSH_MS
         msg = ChatMessage("assistant", "")
         self._streaming_message = msg
-        self.messages_layout.insertWidget(self.messages_layout.count() - 1, msg)
+        self.messages_layout.addWidget(msg)
 
     def add_streaming_content(self, chunk: str):
         if self._streaming_message:
             self._streaming_content += chunk
-            self._streaming_message.update_content(self._streaming_content)
-            QTimer.singleShot(10, self._scroll_bottom)
+            # The label is updated (and re-wrapped) once per flush, not per chunk
+            if not self._stream_flush_timer.isActive():
+                self._stream_flush_timer.start(self._stream_delay_ms)
+
+    def _flush_stream(self):
+        """Show the streamed text so far and follow it to the bottom."""
+        self._stream_flush_timer.stop()
+        if not self._streaming_message:
+            return
+        start = time.perf_counter()
+        self._streaming_message.update_content(self._streaming_content)
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        self._stream_delay_ms = max(self.STREAM_FLUSH_MS, int(4 * elapsed_ms))
+        self._scroll_bottom()
 
     def finish_streaming(self):
+        if self._stream_flush_timer.isActive():
+            self._flush_stream()  # Make sure the final text is shown
         self._streaming_message = None
         self._streaming_content = ""
 
@@ -8354,30 +9567,44 @@ class ChatPanel(QWidget):
             params = {"detail": params} if params else None
 
         tool = ToolInvocation(name, params, status)
-        self.messages_layout.insertWidget(self.messages_layout.count() - 1, tool)
+        self.messages_layout.addWidget(tool)
 
         if tool_id:
             self._tool_widgets[tool_id] = tool
 
-        QTimer.singleShot(50, self._scroll_bottom)
+        self._scroll_bottom()
         return tool
 
     def update_tool_status(self, tool_id: str, status: str, result: str = None, lines_changed: int = None):
         """Update an existing tool's status and optionally set result."""
-        if tool_id in self._tool_widgets:
-            tool = self._tool_widgets[tool_id]
+        tool = self._tool_widgets.get(tool_id)
+        if tool is not None:
             tool.set_status(status)
             if result:
                 tool.set_result(result, lines_changed)
 
     def _scroll_bottom(self):
-        self.scroll.verticalScrollBar().setValue(self.scroll.verticalScrollBar().maximum())
+        """Scroll to the newest entry once the pending layout has run."""
+        if not self._scroll_timer.isActive():
+            self._scroll_timer.start()
+
+    def _do_scroll_bottom(self):
+        scroll_bar = self.scroll.verticalScrollBar()
+        scroll_bar.setValue(scroll_bar.maximum())
 
     def clear(self):
-        while self.messages_layout.count() > 1:
+        # Detach everything first, then delete; one repaint for the whole batch
+        self.messages_container.setUpdatesEnabled(False)
+        widgets = []
+        while self.messages_layout.count():
             item = self.messages_layout.takeAt(0)
             if w := item.widget():
-                w.deleteLater()
+                w.hide()
+                widgets.append(w)
+        for w in widgets:
+            w.deleteLater()
+        self.messages_container.setUpdatesEnabled(True)
+        self._stream_flush_timer.stop()
         self._streaming_message = None
         self._streaming_content = ""
         self._tool_widgets.clear()
@@ -9865,7 +11092,7 @@ class AgentWorker(QObject):
                 from circuit_agent.config import load_anthropic_key
 
                 api_key = load_anthropic_key()
-                with httpx.Client(timeout=10.0) as client:
+                with httpx.Client(timeout=httpx.Timeout(10.0, connect=2.0)) as client:
                     response = client.get(
                         "https://api.anthropic.com/v1/models",
                         headers={